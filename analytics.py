@@ -12,21 +12,67 @@ This module provides a very simple, fully local analytics system that:
     track_event(event, page, props=None)
     track_event_once(event, page, once_key, props=None)
 
+Events are buffered in memory and appended to disk in small batches by a
+background writer thread; `flush_events()` forces the pending ones out.
+Large events files are rotated into gzip archives (`list_event_archives()`).
+
 No data is sent to any external server. Everything stays on disk
-in the same folder as the app.
+in the same folder as the app. Set the environment variable
+RIJKS_ANALYTICS=0 to disable event logging entirely.
 """
 
 from __future__ import annotations
 
+import atexit
+import gzip
 import json
+import os
+import shutil
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
 import streamlit as st
 
-from app_paths import ANALYTICS_FILE, ANALYTICS_CONFIG_FILE
+from app_paths import ANALYTICS_FILE, ANALYTICS_CONFIG_FILE, ANALYTICS_ARCHIVE_GLOB
+
+# Set RIJKS_ANALYTICS=0 in the environment to turn event logging off
+# (e.g. for benchmarking or privacy-sensitive installations). Read once
+# at import time.
+ANALYTICS_ENABLED = os.environ.get("RIJKS_ANALYTICS", "1") != "0"
+
+# ============================================================
+# orjson import (optional, faster event encoding)
+# ============================================================
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# The JSON functions are chosen once at import time, so the per-event path
+# has no branching on which JSON library is installed.
+if ORJSON_AVAILABLE:
+
+    def _dumps(obj: Any) -> bytes:
+        """Encode an object as UTF-8 JSON (orjson, non-str keys coerced like json)."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+
+else:
+
+    def _dumps(obj: Any) -> bytes:
+        """Encode an object as UTF-8 JSON (stdlib fallback)."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
 
 
 # ============================================================
@@ -35,9 +81,38 @@ from app_paths import ANALYTICS_FILE, ANALYTICS_CONFIG_FILE
 # NOTE:
 # ANALYTICS_FILE and ANALYTICS_CONFIG_FILE are defined in app_paths.py.
 # We keep a small in-memory cache so we do not re-read the config file
-# on every event write.
+# on every event write. It is shared by all sessions of the process.
+
+_INSTALL_META_CACHE: Mapping[str, Any] | None = None
+# The same metadata pre-encoded as a JSON object body (no braces), spliced
+# into every event's props instead of re-serializing it per event.
+_INSTALL_META_FRAGMENT: bytes | None = None
+_INSTALL_META_LOCK = threading.Lock()
+
+# Encoded events waiting to be appended to ANALYTICS_FILE. Events are
+# flushed in batches (one open/write/close per batch instead of per event)
+# by a background writer thread, and on interpreter exit. Streamlit runs
+# sessions in threads, so the buffer is guarded by a lock.
+_FLUSH_EVERY = 20
+_FLUSH_INTERVAL_SECONDS = 2.0
+_EVENT_BUFFER: list[bytes] = []
+_EVENT_BUFFER_LOCK = threading.Lock()
+
+# Upper bound on the once-keys remembered per session by track_event_once.
+_ONCE_KEYS_MAX = 4096
 
-_INSTALL_META_CACHE: Dict[str, Any] | None = None
+# When the events file grows past this size it is rotated into a
+# gzip-compressed archive (see _rotate_events_file).
+_ROTATE_MAX_BYTES = 50 * 1024 * 1024
+
+# Serializes file appends so batches land on disk in order.
+_EVENT_WRITE_LOCK = threading.Lock()
+
+# Background writer: woken early when the buffer is full, otherwise it
+# flushes every _FLUSH_INTERVAL_SECONDS.
+_WRITER_WAKEUP = threading.Event()
+_WRITER_THREAD: threading.Thread | None = None
+_WRITER_START_LOCK = threading.Lock()
 
 
 # ============================================================
@@ -47,22 +122,24 @@ def _get_session_id() -> str:
     """
     Return a stable session_id for the current Streamlit session.
 
-    A random UUID is generated the first time and stored in
+    A random UUID (hex form) is generated the first time and stored in
     st.session_state, so all events from the same browser session
-    can be grouped together later.
+    can be grouped together later. The common case is a single
+    session_state lookup.
     """
     key = "_analytics_session_id"
-    sid = st.session_state.get(key)
-    if not sid:
-        sid = str(uuid.uuid4())
+    try:
+        return st.session_state[key]
+    except KeyError:
+        sid = uuid.uuid4().hex
         st.session_state[key] = sid
-    return sid
+        return sid
 
 
 # ============================================================
 # Installation metadata (optional, local only)
 # ============================================================
-def _load_installation_metadata() -> Dict[str, Any]:
+def _get_installation_metadata() -> Mapping[str, Any]:
     """
     Read installation metadata (city/country/timezone) from a local JSON file.
 
@@ -75,83 +152,205 @@ def _load_installation_metadata() -> Dict[str, Any]:
         - installation_country
         - installation_timezone
 
-    The result is cached in memory and attached to every analytics event
-    as props: "install_city", "install_country", "install_timezone".
+    The result is cached once per process (shared by all Streamlit sessions)
+    and attached to every analytics event as props: "install_city",
+    "install_country", "install_timezone". Changes to the config file are
+    picked up after an app restart.
+
+    The cached mapping is read-only. Its pre-encoded form
+    (_INSTALL_META_FRAGMENT) is what actually gets spliced into every
+    event's props, so the two must never diverge.
     """
-    cache_key = "_analytics_installation_meta"
+    global _INSTALL_META_CACHE, _INSTALL_META_FRAGMENT
 
-    # Return cached metadata if already loaded in this Streamlit session
-    if cache_key in st.session_state:
-        return st.session_state[cache_key]
+    if _INSTALL_META_CACHE is not None:
+        return _INSTALL_META_CACHE
 
-    meta: Dict[str, Any] = {}
-    try:
-        if ANALYTICS_CONFIG_FILE.exists():
-            with ANALYTICS_CONFIG_FILE.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+    with _INSTALL_META_LOCK:
+        # Another session may have loaded it while we were waiting
+        if _INSTALL_META_CACHE is not None:
+            return _INSTALL_META_CACHE
+
+        meta: Dict[str, Any] = {}
+        try:
+            # No exists() check: a missing file is just FileNotFoundError
+            with ANALYTICS_CONFIG_FILE.open("rb") as f:
+                data = _loads(f.read())
             if isinstance(data, dict):
                 meta = {
                     "install_city": data.get("installation_city"),
                     "install_country": data.get("installation_country"),
                     "install_timezone": data.get("installation_timezone"),
                 }
-    except Exception:
-        # Analytics should never break the app; fallback to empty metadata
-        meta = {}
+        except Exception:
+            # Missing/invalid config: analytics should never break the app;
+            # fallback to empty metadata
+            meta = {}
+
+        _INSTALL_META_FRAGMENT = _dumps(meta)[1:-1] if meta else b""
+        _INSTALL_META_CACHE = MappingProxyType(meta)
+        return _INSTALL_META_CACHE
+
 
-    st.session_state[cache_key] = meta
-    return meta
+def _get_installation_metadata_fragment() -> bytes:
+    """Return the installation metadata pre-encoded as a JSON object body."""
+    if _INSTALL_META_FRAGMENT is None:
+        _get_installation_metadata()
+    return _INSTALL_META_FRAGMENT
 
 
-# (Legacy helper kept for backward compatibility / future use)
-#def _get_installation_metadata() -> Dict[str, Any]:
+# ============================================================
+# Low-level writer (append JSON lines to file)
+# ============================================================
+def _writer_loop() -> None:
+    """Flush buffered events whenever woken up or the interval elapses."""
+    while True:
+        _WRITER_WAKEUP.wait(_FLUSH_INTERVAL_SECONDS)
+        _WRITER_WAKEUP.clear()
+        flush_events()
+
+
+def _ensure_writer_thread() -> None:
+    """Start the background writer thread once per process."""
+    global _WRITER_THREAD
+
+    if _WRITER_THREAD is not None:
+        return
+
+    with _WRITER_START_LOCK:
+        if _WRITER_THREAD is None:
+            thread = threading.Thread(
+                target=_writer_loop,
+                name="analytics-writer",
+                daemon=True,
+            )
+            thread.start()
+            _WRITER_THREAD = thread
+
+
+def _encode_event(head: Dict[str, Any], props: Optional[Dict[str, Any]]) -> bytes:
     """
-    Legacy helper that reads installation metadata and caches it globally.
+    Encode one event as a JSON line.
 
-    Currently not used by the main functions, but kept for backwards
-    compatibility in case external code imports it.
+    `head` holds the top-level fields (ts, event, page, session_id) and
+    `props` the caller's extra properties (anything other than a dict is
+    treated as no props). The pre-encoded installation metadata is spliced
+    in after `props`, so for a repeated key the metadata value is the one
+    JSON readers keep (last key wins), exactly like the former dict merge.
     """
-    global _INSTALL_META_CACHE
+    meta_fragment = _get_installation_metadata_fragment()
 
-    if _INSTALL_META_CACHE is not None:
-        return _INSTALL_META_CACHE
+    if isinstance(props, dict) and props:
+        props_json = _dumps(props)
+        if meta_fragment:
+            props_json = props_json[:-1] + b"," + meta_fragment + b"}"
+    else:
+        props_json = b"{" + meta_fragment + b"}"
 
-    meta: Dict[str, Any] = {}
-    try:
-        if ANALYTICS_CONFIG_FILE.exists():
-            with ANALYTICS_CONFIG_FILE.open("r", encoding="utf-8") as f:
-                loaded = json.load(f) or {}
-                if isinstance(loaded, dict):
-                    meta = loaded
-    except Exception:
-        meta = {}
+    return _dumps(head)[:-1] + b',"props":' + props_json + b"}\n"
 
-    # Provide default values if not present
-    meta.setdefault("installation_city", "Unknown")
-    meta.setdefault("installation_country", "Unknown")
-    meta.setdefault("installation_timezone", "UTC")
 
-    _INSTALL_META_CACHE = meta
-    return meta
+def _write_event(line: bytes) -> None:
+    """
+    Queue a single encoded analytics event (one JSON line).
 
+    Lines are kept in an in-memory buffer and appended to the file by the
+    background writer thread, so the calling (Streamlit) thread never waits
+    on disk I/O. A full buffer (`_FLUSH_EVERY` events) wakes the writer
+    early.
+    """
+    with _EVENT_BUFFER_LOCK:
+        _EVENT_BUFFER.append(line)
+        buffer_full = len(_EVENT_BUFFER) >= _FLUSH_EVERY
 
-# ============================================================
-# Low-level writer (append JSON lines to file)
-# ============================================================
-def _write_event(record: Dict[str, Any]) -> None:
+    _ensure_writer_thread()
+    if buffer_full:
+        _WRITER_WAKEUP.set()
+
+
+def _append_bytes(payload: bytes) -> int:
     """
-    Append a single analytics event as a JSON line.
+    Append raw bytes to ANALYTICS_FILE with O_APPEND and os.write.
+
+    The payload is already encoded, so the buffered/text io layers are not
+    needed. The file is opened per batch rather than kept open, because it
+    can be rotated or cleared (Statistics page) at any time.
 
-    If anything goes wrong (permissions, disk full, etc.), the function
-    fails silently. Analytics must never break the main app.
+    Returns the file size after the write.
     """
+    fd = os.open(ANALYTICS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
     try:
-        ANALYTICS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with ANALYTICS_FILE.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        view = memoryview(payload)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def _rotate_events_file() -> None:
+    """
+    Move the current events file into a gzip-compressed archive.
+
+    The file is renamed first, so new batches immediately start a fresh
+    ANALYTICS_FILE, and then compressed in a streaming fashion. Must be
+    called with _EVENT_WRITE_LOCK held.
+
+    If compression fails, the partial archive is removed and the events are
+    moved back to ANALYTICS_FILE (no batch can have started a new one while
+    the lock is held), so they stay visible and rotation is retried on a
+    later flush.
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    pending = ANALYTICS_FILE.with_name(f"analytics_events.{stamp}.json")
+    archive = pending.with_name(pending.name + ".gz")
+
+    os.replace(ANALYTICS_FILE, pending)
+    try:
+        with pending.open("rb") as src, gzip.open(archive, "wb") as dst:
+            shutil.copyfileobj(src, dst)
     except Exception:
-        # Analytics should never crash the app
-        pass
+        archive.unlink(missing_ok=True)
+        os.replace(pending, ANALYTICS_FILE)
+        raise
+    pending.unlink()
+
+
+def list_event_archives() -> list[Path]:
+    """Return the rotated (gzip) events files, oldest first."""
+    return sorted(ANALYTICS_FILE.parent.glob(ANALYTICS_ARCHIVE_GLOB))
+
+
+def flush_events() -> None:
+    """
+    Append all buffered events to ANALYTICS_FILE in a single write.
+
+    Called periodically by the background writer and on interpreter exit.
+    Readers of the events file (e.g. the Statistics page) should call it
+    first so they see the latest events. If the file has grown past
+    `_ROTATE_MAX_BYTES`, it is rotated into a compressed archive.
+    """
+    with _EVENT_WRITE_LOCK:
+        with _EVENT_BUFFER_LOCK:
+            if not _EVENT_BUFFER:
+                return
+            payload = b"".join(_EVENT_BUFFER)
+            _EVENT_BUFFER.clear()
+
+        # The buffer lock is released here, so sessions can keep queueing
+        # events while the batch is being written.
+        try:
+            ANALYTICS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            size = _append_bytes(payload)
+            if size > _ROTATE_MAX_BYTES:
+                _rotate_events_file()
+        except Exception:
+            # Analytics should never crash the app
+            pass
+
+
+atexit.register(flush_events)
 
 
 # ============================================================
@@ -178,21 +377,26 @@ def track_event(
         These are merged with installation metadata.
 
     All events are stored locally in `analytics_events.json` as JSON lines
-    with fields: ts, event, page, session_id, props.
+    with fields: ts, event, page, session_id, props. Nothing is logged when
+    analytics is disabled (RIJKS_ANALYTICS=0).
     """
-    base_props = props.copy() if isinstance(props, dict) else {}
-
-    # Attach installation metadata (city/country/timezone) if available
-    base_props.update(_load_installation_metadata())
+    if not ANALYTICS_ENABLED:
+        return
 
-    record = {
+    head = {
         "ts": time.time(),
         "event": event,
         "page": page,
         "session_id": _get_session_id(),
-        "props": base_props,
     }
-    _write_event(record)
+    try:
+        # Installation metadata (city/country/timezone) is attached to the
+        # props while encoding
+        line = _encode_event(head, props)
+    except Exception:
+        # Analytics should never crash the app
+        return
+    _write_event(line)
 
 
 def track_event_once(
@@ -216,15 +420,26 @@ def track_event_once(
         Logical page name (e.g. "Explorer").
     once_key:
         Unique key used to remember if the event has already been logged
-        during this session (e.g. "page_view::Explorer").
+        during this session (e.g. "page_view::Explorer"). Only the most
+        recent `_ONCE_KEYS_MAX` keys are remembered.
     props:
         Optional dictionary with extra properties.
     """
-    state_key = f"_analytics_once::{once_key}"
-    if st.session_state.get(state_key):
+    if not ANALYTICS_ENABLED:
+        return
+
+    seen = st.session_state.get("_analytics_once_keys")
+    if seen is None:
+        seen = OrderedDict()
+        st.session_state["_analytics_once_keys"] = seen
+
+    if once_key in seen:
         # Already logged in this session; do nothing
         return
 
-    # Mark as logged and forward to track_event
-    st.session_state[state_key] = True
-    track_event(event=event, page=page, props=props)
\ No newline at end of file
+    # Mark as logged (evicting the oldest keys past the cap, so long-running
+    # kiosk sessions do not grow without bound) and forward to track_event
+    seen[once_key] = True
+    if len(seen) > _ONCE_KEYS_MAX:
+        seen.popitem(last=False)
+    track_event(event=event, page=page, props=props)
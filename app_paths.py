@@ -25,9 +25,13 @@ ANALYTICS_DIR = DATA_DIR
 # Static assets (images, etc.)
 ASSETS_DIR = BASE_DIR / "assets"
 
+# Downloaded artwork images (used by the PDF export), one file per image URL
+IMAGE_CACHE_DIR = BASE_DIR / "data" / "image_cache"
+
 # Ensure base directories exist
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 ANALYTICS_DIR.mkdir(parents=True, exist_ok=True)
+IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 # ============================================================
 # Local persistence files (selection, notes, PDF metadata)
@@ -45,6 +49,10 @@ ANALYTICS_EVENTS_FILE = DATA_DIR / "analytics_events.json"
 # Alias used by analytics.py (kept for backwards compatibility)
 ANALYTICS_FILE = ANALYTICS_EVENTS_FILE
 
+# Rotated, gzip-compressed events files live next to the main file:
+# "analytics_events.<YYYYMMDD-HHMMSS-micro>.json.gz" (names sort by time)
+ANALYTICS_ARCHIVE_GLOB = "analytics_events.*.json.gz"
+
 # Optional local configuration for analytics:
 # - installation_city / installation_country / installation_timezone
 # - analytics_admin_code (for the Statistics page access)
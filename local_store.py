@@ -0,0 +1,133 @@
+# local_store.py
+"""
+Helpers for reading the app's local JSON files (favorites, notes, PDF meta).
+
+This module handles:
+- Reading JSON files into dicts, tolerating missing or invalid files.
+- File signatures (mtime, size) used to skip redundant saves.
+- JSON encoding and atomic file replacement for the saves (dumps_json,
+  write_bytes_atomic).
+- Saving the favorites file, shared by every page (save_favorites).
+- Optional orjson parsing/encoding (falls back to the standard json module).
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from app_paths import FAV_FILE
+
+# orjson is optional: it only speeds up reading/writing the local JSON files
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# ============================================================
+# Reading
+# ============================================================
+def file_signature(path: str | Path) -> tuple[int, int] | None:
+    """Return (mtime_ns, size) of a file, or None if it cannot be stat'ed."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_json_file(path: str | Path) -> dict:
+    """
+    Safe JSON file reader that always returns a dict (or empty dict).
+
+    The file is parsed on every call (with orjson when available): that is
+    cheaper than caching the parsed dict and deep-copying it for each
+    caller, and every caller gets a fresh dict it may mutate.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# ============================================================
+# Encoding
+# ============================================================
+def dumps_json(obj, pretty: bool = False) -> bytes:
+    """
+    Encode an object as UTF-8 JSON bytes, ready to be written in "wb" mode.
+
+    pretty=True uses a 2-space indent (files people may open by hand, e.g.
+    notes and PDF meta); otherwise the output is compact.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ============================================================
+# Writing
+# ============================================================
+def write_bytes_atomic(path: str | Path, payload: bytes) -> None:
+    """
+    Replace a file's content with `payload` atomically.
+
+    The bytes go to a uniquely named temporary file next to `path` (several
+    sessions may save at the same time), which is then swapped in with
+    os.replace, so readers never see a half-written file. Errors are raised
+    to the caller.
+    """
+    path_str = str(path)
+    tmp_path = f"{path_str}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path_str)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ============================================================
+# Favorites
+# ============================================================
+def save_favorites(favorites: dict, state: MutableMapping) -> None:
+    """
+    Persist `favorites` to FAV_FILE.
+
+    `state` is the session's st.session_state; its "_fav_saved" entry holds
+    (digest, file signature) of the last write from this session, so the
+    write is skipped when the encoded favorites are unchanged and the file
+    has not been touched since. Errors are swallowed: favorites are a
+    convenience layer and must never break the UI.
+    """
+    try:
+        # Compact JSON (the file is machine-read), swapped in atomically
+        payload = dumps_json(favorites)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+
+        fav_path = str(FAV_FILE)
+        if state.get("_fav_saved") == (digest, file_signature(fav_path)):
+            return
+
+        write_bytes_atomic(fav_path, payload)
+        state["_fav_saved"] = (digest, file_signature(fav_path))
+    except Exception:
+        pass
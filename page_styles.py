@@ -0,0 +1,285 @@
+# page_styles.py
+"""
+Inline CSS and static HTML fragments for the Streamlit pages.
+
+Streamlit re-executes page scripts on every rerun, so markup defined inside a
+page is rebuilt each time. Kept here, in an imported module, the snippets are
+compacted once per process and the pages only hand the prebuilt strings to
+st.html / st.markdown. The pages still emit them on every rerun, because
+Streamlit drops elements that a rerun does not emit again.
+"""
+
+
+# ============================================================
+# Helpers
+# ============================================================
+def _compact_html(snippet: str) -> str:
+    """Strip indentation and blank lines from an inline HTML/CSS snippet."""
+    return "\n".join(line.strip() for line in snippet.splitlines() if line.strip())
+
+
+# ============================================================
+# Explorer (🏠_Home.py)
+# ============================================================
+EXPLORER_CSS_HTML = _compact_html(
+    """
+    <style>
+    .stApp { background-color: #111111; color: #f5f5f5; }
+    div.block-container { max-width: 1200px; padding-top: 1.5rem; padding-bottom: 3rem; }
+
+    section[data-testid="stSidebar"] { background-color: #181818 !important; }
+    section[data-testid="stSidebar"] h1,
+    section[data-testid="stSidebar"] h2,
+    section[data-testid="stSidebar"] h3,
+    section[data-testid="stSidebar"] label { color: #f5f5f5 !important; }
+
+    div[data-testid="stMarkdownContainer"] a { color: #ff9900 !important; text-decoration: none; }
+    div[data-testid="stMarkdownContainer"] a:hover { text-decoration: underline; }
+
+    .rijks-hero {
+        border-radius: 14px;
+        overflow: hidden;
+        box-shadow: 0 4px 18px rgba(0,0,0,0.6);
+        margin-bottom: 0.85rem;
+    }
+
+    .rijks-summary-pill {
+        display: inline-block;
+        padding: 4px 10px;
+        border-radius: 999px;
+        background-color: #262626;
+        color: #f5f5f5;
+        font-size: 0.85rem;
+        margin-top: 0.35rem;
+        margin-bottom: 1.0rem;
+    }
+    .rijks-summary-pill strong { color: #ff9900; }
+
+    .rijks-card {
+        background-color: #181818;
+        border-radius: 12px;
+        padding: 0.75rem 0.75rem 0.9rem 0.75rem;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.4);
+        border: 1px solid #262626;
+        margin-bottom: 1rem;
+        margin-top: 0.35rem;
+    }
+    .rijks-card img {
+        width: 100%;
+        height: 260px;
+        object-fit: cover;
+        border-radius: 8px;
+    }
+    .rijks-card-title {
+        font-size: 1rem;
+        font-weight: 600;
+        margin-top: 0.35rem;
+        margin-bottom: 0.1rem;
+        min-height: 1.3rem;
+    }
+    .rijks-card-caption { font-size: 0.9rem; color: #c7c7c7; margin-bottom: 0.25rem; }
+    .rijks-card-meta { font-size: 0.85rem; color: #dddddd; margin-bottom: 0.2rem; }
+
+    .rijks-badge-row { margin-top: 0.15rem; margin-bottom: 0.35rem; }
+    .rijks-badge {
+        display: inline-block;
+        padding: 2px 8px;
+        border-radius: 999px;
+        font-size: 0.73rem;
+        margin-right: 0.25rem;
+        background-color: #262626;
+        color: #f5f5f5;
+        border: 1px solid #333333;
+    }
+    .rijks-badge-primary { background-color: #ff9900; color: #111111; border-color: #ff9900; }
+    .rijks-badge-secondary { background-color: #262626; color: #ffddaa; border-color: #444444; }
+
+    .rijks-no-image-msg {
+        font-size: 0.8rem;
+        color: #cccccc;
+        background-color: #202020;
+        border-radius: 8px;
+        padding: 0.45rem 0.55rem;
+        margin-top: 0.25rem;
+        border: 1px dashed #444444;
+    }
+
+    .rijks-footer {
+        margin-top: 2.5rem;
+        padding-top: 0.75rem;
+        border-top: 1px solid #262626;
+        font-size: 0.8rem;
+        color: #aaaaaa;
+        text-align: center;
+    }
+
+    .stButton > button { border-radius: 999px; }
+    </style>
+    """
+)
+
+EXPLORER_FOOTER_HTML = _compact_html(
+    """
+    <div class="rijks-footer">
+        Rijksmuseum Explorer — prototype created for study & research purposes.<br>
+        Data & images provided by the Rijksmuseum API.
+    </div>
+    """
+)
+
+EXPLORER_IMAGE_FAILED_HTML = _compact_html(
+    """
+    <div class="rijks-no-image-msg">
+    The image for this artwork could not be loaded via the public API
+    at this moment.<br>
+    You can still open it on the Rijksmuseum website using the link below.
+    </div>
+    """
+)
+
+EXPLORER_NO_IMAGE_HTML = _compact_html(
+    """
+    <div class="rijks-no-image-msg">
+    No public image is available for this artwork via the Rijksmuseum API.<br>
+    If needed, please use the link below to check it directly on the museum website.
+    </div>
+    """
+)
+
+
+# ============================================================
+# My Selection (pages/⭐_My_Selection.py)
+# ============================================================
+SELECTION_CSS_HTML = _compact_html(
+    """
+    <style>
+    .stApp { background-color: #111111; color: #f5f5f5; }
+
+    div.block-container {
+        max-width: 95vw;
+        padding-left: 2rem;
+        padding-right: 2rem;
+        padding-top: 1.2rem;
+        padding-bottom: 2.5rem;
+    }
+
+    @media (min-width: 1400px) {
+        div.block-container {
+            padding-left: 3rem;
+            padding-right: 3rem;
+        }
+    }
+
+    section[data-testid="stSidebar"] {
+        background-color: #181818 !important;
+    }
+
+    h1, h2, h3 { font-weight: 600; }
+    h2 { font-size: 1.5rem; margin-top: 0.5rem; margin-bottom: 0.75rem; }
+    h3 { font-size: 1.15rem; margin-top: 1.25rem; margin-bottom: 0.5rem; }
+
+    div[data-testid="stMarkdownContainer"] a {
+        color: #ff9900 !important;
+        text-decoration: none;
+    }
+    div[data-testid="stMarkdownContainer"] a:hover { text-decoration: underline; }
+
+    .rijks-card {
+        background-color: #181818;
+        border-radius: 12px;
+        padding: 0.75rem 0.75rem 0.9rem 0.75rem;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.4);
+        border: 1px solid #262626;
+        margin-bottom: 1rem;
+        margin-top: 0.35rem;
+    }
+
+    .rijks-card.rijks-card-has-notes {
+        border-color: #ffb347;
+        box-shadow: 0 0 0 1px #ffb347, 0 2px 10px rgba(0,0,0,0.6);
+    }
+
+    .rijks-card.rijks-card-no-notes { opacity: 0.95; }
+
+    .rijks-card img {
+        width: 100%;
+        height: 260px;
+        object-fit: cover;
+        border-radius: 8px;
+    }
+
+    .rijks-card-title {
+        font-size: 0.95rem;
+        font-weight: 600;
+        line-height: 1.25;
+        color: #f1f1f1;
+        margin-top: 0.5rem;
+        margin-bottom: 0.1rem;
+        min-height: 1.3rem;
+    }
+
+    .rijks-card-caption {
+        font-size: 0.8rem;
+        color: #b8b8b8;
+        margin-bottom: 0.25rem;
+    }
+
+    .rijks-summary-pill {
+        display: inline-block;
+        padding: 4px 10px;
+        border-radius: 999px;
+        background-color: #262626;
+        color: #f5f5f5;
+        font-size: 0.85rem;
+        margin-top: 0.5rem;
+        margin-bottom: 1rem;
+    }
+    .rijks-summary-pill strong { color: #ff9900; }
+
+    .rijks-export-panel {
+        background-color: #181818;
+        border-radius: 12px;
+        padding: 1rem 1.25rem 1.1rem 1.25rem;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.4);
+        border: 1px solid #262626;
+        margin-top: 0.75rem;
+        margin-bottom: 1.5rem;
+    }
+
+    .export-card {
+        background-color: #202020;
+        border-radius: 12px;
+        padding: 0.8rem 0.9rem 0.95rem 0.9rem;
+        border: 1px solid #333333;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.45);
+        text-align: center;
+    }
+
+    .export-card h4 { margin: 0 0 0.4rem 0; font-size: 0.95rem; }
+    .export-card p { font-size: 0.8rem; color: #c7c7c7; margin-bottom: 0.6rem; }
+
+    .rijks-footer {
+        margin-top: 2.5rem;
+        padding-top: 0.75rem;
+        border-top: 1px solid #262626;
+        font-size: 0.8rem;
+        color: #aaaaaa;
+        text-align: center;
+    }
+
+    .rijks-card:hover {
+        background-color: rgba(255, 255, 255, 0.02);
+    }
+
+    /* Highlight for artworks marked as comparison candidates */
+    .rijks-card-compare-candidate {
+        border-color: #ffb347;
+        box-shadow:
+            0 0 0 1px #ffb347,
+            0 4px 14px rgba(0, 0, 0, 0.9);
+        position: relative;
+    }
+
+    </style>
+    """
+)
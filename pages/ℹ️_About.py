@@ -202,7 +202,7 @@ st.write(
     "basic metadata and, when enabled, your research notes and optional comments.\n"
     "- **Export research notes** – download your notes separately as CSV or JSON to combine "
     "with other research materials.\n"
-    "- **Share / import a collection code** – generate a base64 text code that represents "
+    "- **Share / import a collection code** – generate a compact text code that represents "
     "your current selection. Another person using the same app can paste this code to load "
     "exactly the same set of artworks."
 )
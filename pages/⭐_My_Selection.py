@@ -2,16 +2,29 @@ import json
 import io
 import csv
 import base64
+import hashlib
+import html
+import importlib.util
+import os
+import uuid
+import zlib
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from textwrap import wrap
+from pathlib import Path
+from textwrap import TextWrapper
 
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 
-from app_paths import FAV_FILE, NOTES_FILE, PDF_META_FILE
+from app_paths import FAV_FILE, NOTES_FILE, PDF_META_FILE, IMAGE_CACHE_DIR
 from rijks_api import get_best_image_url
 from analytics import track_event
+from local_store import dumps_json, read_json_file, save_favorites, write_bytes_atomic
+from page_styles import SELECTION_CSS_HTML
 
 """
 My Selection page
@@ -28,25 +41,14 @@ This page shows the user's saved artworks (local favorites). It provides:
 """
 
 # ============================================================
-# ReportLab import (optional PDF generation with thumbnails)
+# ReportLab / Pillow (optional PDF generation with thumbnails)
 # ============================================================
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
+# Only availability is checked here; the modules are imported inside the
+# PDF builder, so opening this page does not pay their import cost.
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
 
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-
-# ============================================================
-# Image URL cache helper
-# ============================================================
-@st.cache_data(show_spinner=False)
-def cached_best_image_url(art: dict):
-    """Small cache wrapper around get_best_image_url for faster gallery rendering."""
-    return get_best_image_url(art)
+# Pillow is optional too: without it PDF images are embedded at full size
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
 
 
 # ============================================================
@@ -78,15 +80,8 @@ def load_pdf_meta() -> dict:
         "include_notes": True,
         # Campos antigos (include_comments, artwork_comments) foram descontinuados.
     }
-    if PDF_META_FILE.exists():
-        try:
-            with open(PDF_META_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    base.update(data)
-        except Exception:
-            # PDF meta is optional; never break the app because of it
-            pass
+    # PDF meta is optional; read_json_file returns {} when missing or invalid
+    base.update(read_json_file(PDF_META_FILE))
 
     st.session_state["pdf_meta"] = base
     return base
@@ -100,27 +95,15 @@ def load_notes() -> None:
     if "notes" in st.session_state:
         return
 
-    if NOTES_FILE.exists():
-        try:
-            with open(NOTES_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                st.session_state["notes"] = data if isinstance(data, dict) else {}
-        except Exception:
-            st.session_state["notes"] = {}
-    else:
-        st.session_state["notes"] = {}
+    st.session_state["notes"] = read_json_file(NOTES_FILE)
 
 
 def save_notes() -> None:
     """Persist current notes from session_state to NOTES_FILE."""
     try:
-        with open(NOTES_FILE, "w", encoding="utf-8") as f:
-            json.dump(
-                st.session_state.get("notes", {}),
-                f,
-                ensure_ascii=False,
-                indent=2,
-            )
+        # Encode first, then swap the file in atomically
+        payload = dumps_json(st.session_state.get("notes", {}), pretty=True)
+        write_bytes_atomic(NOTES_FILE, payload)
     except Exception:
         # Notes are a convenience feature; never break the app here
         pass
@@ -129,6 +112,27 @@ def save_notes() -> None:
 # ============================================================
 # Selection statistics helper
 # ============================================================
+def get_selection_year(art: dict) -> int | None:
+    """
+    Return the approximate year of an artwork: `dating.year` when it is an
+    int, otherwise the first 4 digits of `dating.presentingDate`.
+    """
+    dating = art.get("dating") or {}
+
+    # Prefer numeric year when available
+    if isinstance(dating.get("year"), int):
+        return dating["year"]
+
+    presenting_date = dating.get("presentingDate")
+    if isinstance(presenting_date, str) and presenting_date[:4].isdigit():
+        try:
+            return int(presenting_date[:4])
+        except Exception:
+            return None
+
+    return None
+
+
 def compute_selection_stats(favorites_dict: dict) -> dict:
     """
     Compute basic statistics for a favorites dictionary:
@@ -140,34 +144,20 @@ def compute_selection_stats(favorites_dict: dict) -> dict:
     if not favorites_dict:
         return {"count": 0, "artists": 0, "min_year": None, "max_year": None}
 
-    artworks = list(favorites_dict.values())
     artists = set()
     years: list[int] = []
 
-    for art in artworks:
+    for art in favorites_dict.values():
         maker = art.get("principalOrFirstMaker")
         if maker:
             artists.add(maker)
 
-        dating = art.get("dating") or {}
-        year = None
-
-        # Prefer numeric year when available
-        if isinstance(dating.get("year"), int):
-            year = dating["year"]
-        else:
-            presenting_date = dating.get("presentingDate")
-            if isinstance(presenting_date, str) and presenting_date[:4].isdigit():
-                try:
-                    year = int(presenting_date[:4])
-                except Exception:
-                    year = None
-
+        year = get_selection_year(art)
         if year is not None:
             years.append(year)
 
     return {
-        "count": len(artworks),
+        "count": len(favorites_dict),
         "artists": len(artists),
         "min_year": min(years) if years else None,
         "max_year": max(years) if years else None,
@@ -175,229 +165,326 @@ def compute_selection_stats(favorites_dict: dict) -> dict:
 
 
 # ============================================================
-# Internal metadata filter helper (inside selection)
+# Internal metadata filter helpers (inside selection)
 # ============================================================
-def passes_selection_filters(
-    art: dict,
+def build_selection_filter_rows(favorites_dict: dict) -> list[tuple]:
+    """
+    Flatten the favorites into rows with everything the internal metadata
+    filters need, already normalized:
+
+        (obj_num, year, search_blob, artist_folded, object_types_folded)
+
+    `search_blob` joins title / longTitle / maker / materials / techniques /
+    places / types, case-folded, so the free-text filter is a single
+    substring test per artwork.
+    """
+    rows: list[tuple] = []
+
+    for obj_num, art in favorites_dict.items():
+        parts: list[str] = []
+
+        for field in ("title", "longTitle", "principalOrFirstMaker"):
+            value = art.get(field)
+            if isinstance(value, str):
+                parts.append(value.casefold())
+
+        for field in ("materials", "techniques", "productionPlaces", "objectTypes"):
+            values = art.get(field) or []
+            if isinstance(values, list):
+                parts.extend(str(v).casefold() for v in values)
+
+        rows.append(
+            (
+                obj_num,
+                get_selection_year(art),
+                " | ".join(parts),
+                (art.get("principalOrFirstMaker") or "").casefold(),
+                ", ".join(art.get("objectTypes") or []).casefold(),
+            )
+        )
+
+    return rows
+
+
+# Separator between the search blobs in the selection corpus
+_CORPUS_SEP = "\x00"
+
+
+def build_search_corpus(rows: list[tuple]) -> tuple[str, list[int]]:
+    """
+    Concatenate the search blobs of all rows into one string and return it
+    with the offset where each row's blob starts, so the free-text filter
+    can scan the whole selection with str.find instead of one substring
+    test per artwork.
+    """
+    starts: list[int] = []
+    offset = 0
+
+    for row in rows:
+        starts.append(offset)
+        offset += len(row[2]) + len(_CORPUS_SEP)
+
+    return _CORPUS_SEP.join(row[2] for row in rows), starts
+
+
+def get_selection_index(favorites_dict: dict) -> dict:
+    """
+    Return the derived data for the current selection, cached in
+    session_state["fav_search_index"]:
+
+    - rows / corpus / starts: see build_selection_filter_rows and
+      build_search_corpus (used by filter_selection_rows)
+    - years: objectNumber -> approximate year (see get_selection_year)
+    - stats: see compute_selection_stats
+
+    Saved artworks do not change their metadata, so the index is only
+    rebuilt when the set of objectNumbers in the selection changes (the
+    frozenset itself is the key, so no hash collision can keep a stale
+    index). Handlers that replace artworks wholesale (code import, clear)
+    drop the index instead.
+    """
+    index_key = frozenset(favorites_dict)
+    index = st.session_state.get("fav_search_index")
+
+    if not isinstance(index, dict) or index["key"] != index_key:
+        rows = build_selection_filter_rows(favorites_dict)
+        corpus, starts = build_search_corpus(rows)
+        index = {
+            "key": index_key,
+            "rows": rows,
+            "corpus": corpus,
+            "starts": starts,
+            "years": {row[0]: row[1] for row in rows},
+            "stats": compute_selection_stats(favorites_dict),
+        }
+        st.session_state["fav_search_index"] = index
+
+    return index
+
+
+def find_text_matches(corpus: str, starts: list[int], needle: str) -> set[int]:
+    """
+    Return the indexes of the rows whose search blob contains `needle`.
+
+    After a hit, the scan jumps to the start of the next blob, so str.find
+    runs at most once per matching row (plus one final miss).
+    """
+    if _CORPUS_SEP in needle:
+        # A needle with the separator could match across two blobs
+        return set()
+
+    hits: set[int] = set()
+    last_row = len(starts) - 1
+    pos = corpus.find(needle)
+
+    while pos != -1:
+        row_idx = bisect_right(starts, pos) - 1
+        hits.add(row_idx)
+        if row_idx >= last_row:
+            break
+        pos = corpus.find(needle, starts[row_idx + 1])
+
+    return hits
+
+
+def filter_selection_rows(
+    rows: list[tuple],
+    corpus: str,
+    starts: list[int],
     text_filter: str,
     year_min: int,
     year_max: int,
     artist_filter: str,
     object_type_filter: str,
-) -> bool:
+) -> list[str]:
     """
-    Return True if an artwork passes the internal metadata filters.
+    Return the objectNumbers of the rows (see get_selection_index)
+    that pass the internal metadata filters:
 
-    Filters:
     - year range
     - free text (title / longTitle / maker / materials / techniques / places / types)
     - artist substring
     - object type substring
-    """
-    dating = art.get("dating") or {}
-    year_val = None
 
-    if isinstance(dating.get("year"), int):
-        year_val = dating["year"]
-    else:
-        presenting_date = dating.get("presentingDate")
-        if isinstance(presenting_date, str) and presenting_date[:4].isdigit():
-            try:
-                year_val = int(presenting_date[:4])
-            except Exception:
-                year_val = None
+    The filter strings are normalized (casefold + strip) once for the whole
+    selection; an empty string disables that filter.
+    """
+    text_needle = text_filter.casefold().strip()
+    artist_needle = artist_filter.casefold().strip()
+    type_needle = object_type_filter.casefold().strip()
+
+    # Only the active filters get a pass; the free-text hits (usually the
+    # most selective) narrow the rows first, keeping the selection order
+    if text_needle:
+        rows = [rows[idx] for idx in sorted(find_text_matches(corpus, starts, text_needle))]
+    if artist_needle:
+        rows = [row for row in rows if artist_needle in row[3]]
+    if type_needle:
+        rows = [row for row in rows if type_needle in row[4]]
 
-    if year_val is not None and not (year_min <= year_val <= year_max):
-        return False
+    return [
+        obj_num
+        for obj_num, year, _blob, _artist, _types in rows
+        if year is None or year_min <= year <= year_max
+    ]
 
-    # Free-text filter
-    if text_filter:
-        needle = text_filter.lower().strip()
-        if needle:
-            parts: list[str] = []
 
-            for field in ("title", "longTitle", "principalOrFirstMaker"):
-                value = art.get(field)
-                if isinstance(value, str):
-                    parts.append(value.lower())
+# ============================================================
+# Export helpers (CSV / JSON / share code / notes)
+# ============================================================
+# Collection codes: "1" + base85 of the zlib-compressed compact JSON.
+# Older codes are plain base64 of the JSON, which always starts with "ey"
+# ('{"'), so the prefix is unambiguous.
+_COLLECTION_CODE_V1 = "1"
+# Anything longer is not a selection exported by this app
+_COLLECTION_CODE_MAX_LEN = 5_000_000
+# Upper bound for the decompressed JSON (a small code must not be able to
+# inflate into gigabytes)
+_COLLECTION_CODE_MAX_JSON_BYTES = 50_000_000
 
-            for field in ("materials", "techniques", "productionPlaces", "objectTypes"):
-                values = art.get(field) or []
-                if isinstance(values, list):
-                    parts.extend(str(v).lower() for v in values)
 
-            if needle not in " | ".join(parts):
-                return False
+def encode_collection_code(favorites_compact: bytes) -> str:
+    """Return the collection code for the compact favorites JSON."""
+    compressed = zlib.compress(favorites_compact, 6)
+    return _COLLECTION_CODE_V1 + base64.b85encode(compressed).decode("ascii")
 
-    # Artist substring
-    if artist_filter:
-        artist = (art.get("principalOrFirstMaker") or "").lower()
-        if artist_filter.lower().strip() not in artist:
-            return False
 
-    # Object type substring
-    if object_type_filter:
-        obj_types = art.get("objectTypes") or []
-        if object_type_filter.lower().strip() not in ", ".join(obj_types).lower():
-            return False
+def decode_collection_code(code: str):
+    """
+    Decode a collection code (current or legacy base64 format) back into
+    the parsed JSON. Whitespace from copy/paste is ignored; errors are
+    raised to the caller.
+    """
+    code = "".join(code.split())
+    if len(code) > _COLLECTION_CODE_MAX_LEN:
+        raise ValueError("the code is too large")
+    if code.startswith(_COLLECTION_CODE_V1):
+        decompressor = zlib.decompressobj()
+        raw = decompressor.decompress(
+            base64.b85decode(code[len(_COLLECTION_CODE_V1):]),
+            _COLLECTION_CODE_MAX_JSON_BYTES,
+        )
+        if decompressor.unconsumed_tail:
+            raise ValueError("the code expands to too much data")
+        if not decompressor.eof:
+            raise ValueError("the code is incomplete")
+    else:
+        raw = base64.b64decode(code.encode("ascii"))
+    return json.loads(raw.decode("utf-8"))
 
-    return True
 
+def build_csv_bytes(header: list[str], rows: list) -> bytes:
+    """
+    Write a CSV (header + rows) straight into UTF-8 bytes, ready for
+    st.download_button, without building an intermediate str.
+    """
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(header)
+    writer.writerows(rows)
+    text.detach()  # keep the BytesIO open
+    return buffer.getvalue()
 
-# ============================================================
-# Custom CSS & footer
-# ============================================================
-def inject_custom_css() -> None:
-    """Inject dark-mode layout and gallery card styling."""
-    st.markdown(
-        """
-        <style>
-        .stApp { background-color: #111111; color: #f5f5f5; }
-
-        div.block-container {
-            max-width: 95vw;
-            padding-left: 2rem;
-            padding-right: 2rem;
-            padding-top: 1.2rem;
-            padding-bottom: 2.5rem;
-        }
 
-        @media (min-width: 1400px) {
-            div.block-container {
-                padding-left: 3rem;
-                padding-right: 3rem;
-            }
-        }
+def build_selection_exports(
+    favorites_dict: dict, notes_dict: dict, favorites_compact: bytes
+) -> dict:
+    """
+    Serialize the selection for the export panel (`favorites_compact` is
+    dumps_json(favorites_dict), already computed by the caller):
+
+    - csv: artworks table (bytes; None when the selection is empty)
+    - json_pretty: full favorites JSON (bytes)
+    - code: collection code (see encode_collection_code)
+    - notes_csv: research notes table (bytes; None when there are no notes)
+    - notes_json: all notes as JSON (bytes)
+    - notes_count: number of artworks in the selection with a note
+    """
+    # Rows for both CSVs, in a single pass over the selection:
+    # every artwork goes to the base CSV, artworks with a note to the notes CSV
+    rows: list[tuple] = []
+    notes_rows: list[tuple] = []
+    for obj_num, art in favorites_dict.items():
+        art_get = art.get
+        title = art_get("title", "")
+        maker = art_get("principalOrFirstMaker", "")
+        dating = art_get("dating", {}) or {}
+        date = dating.get("presentingDate") or dating.get("year") or ""
+        link = art_get("links", {}).get("web", "")
 
-        section[data-testid="stSidebar"] {
-            background-color: #181818 !important;
-        }
+        # Most selections have no notes at all: skip the lookup then
+        note_text = notes_dict.get(obj_num, "") if notes_dict else ""
+        note_text = note_text.strip() if isinstance(note_text, str) else ""
 
-        h1, h2, h3 { font-weight: 600; }
-        h2 { font-size: 1.5rem; margin-top: 0.5rem; margin-bottom: 0.75rem; }
-        h3 { font-size: 1.15rem; margin-top: 1.25rem; margin-bottom: 0.5rem; }
+        # has_notes flag for the base CSV
+        rows.append((obj_num, title, maker, date, link, bool(note_text)))
 
-        div[data-testid="stMarkdownContainer"] a {
-            color: #ff9900 !important;
-            text-decoration: none;
-        }
-        div[data-testid="stMarkdownContainer"] a:hover { text-decoration: underline; }
-
-        .rijks-card {
-            background-color: #181818;
-            border-radius: 12px;
-            padding: 0.75rem 0.75rem 0.9rem 0.75rem;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.4);
-            border: 1px solid #262626;
-            margin-bottom: 1rem;
-            margin-top: 0.35rem;
-        }
+        if note_text:
+            notes_rows.append((obj_num, title, maker, note_text))
 
-        .rijks-card.rijks-card-has-notes {
-            border-color: #ffb347;
-            box-shadow: 0 0 0 1px #ffb347, 0 2px 10px rgba(0,0,0,0.6);
-        }
-
-        .rijks-card.rijks-card-no-notes { opacity: 0.95; }
-
-        .rijks-card img {
-            width: 100%;
-            height: 260px;
-            object-fit: cover;
-            border-radius: 8px;
-        }
+    csv_data = None
+    if rows:
+        csv_data = build_csv_bytes(
+            ["objectNumber", "title", "artist", "date", "web_link", "has_notes"],
+            rows,
+        )
 
-        .rijks-card-title {
-            font-size: 1rem;
-            font-weight: 600;
-            margin-top: 0.35rem;
-            margin-bottom: 0.1rem;
-            min-height: 1.3rem;
-        }
+    # Full favorites JSON (UTF-8 bytes; download buttons take them as-is)
+    favorites_json_pretty = dumps_json(favorites_dict, pretty=True)
 
-        .rijks-card-caption {
-            font-size: 0.9rem;
-            color: #c7c7c7;
-            margin-bottom: 0.35rem;
-        }
+    # Collection code (compressed compact JSON)
+    collection_code = encode_collection_code(favorites_compact)
 
-        .rijks-summary-pill {
-            display: inline-block;
-            padding: 4px 10px;
-            border-radius: 999px;
-            background-color: #262626;
-            color: #f5f5f5;
-            font-size: 0.85rem;
-            margin-top: 0.5rem;
-            margin-bottom: 1rem;
-        }
-        .rijks-summary-pill strong { color: #ff9900; }
-
-        .rijks-export-panel {
-            background-color: #181818;
-            border-radius: 12px;
-            padding: 1rem 1.25rem 1.1rem 1.25rem;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.4);
-            border: 1px solid #262626;
-            margin-top: 0.75rem;
-            margin-bottom: 1.5rem;
-        }
+    # Notes exports (CSV + JSON)
+    notes_csv_data = None
+    if notes_rows:
+        notes_csv_data = build_csv_bytes(
+            ["objectNumber", "title", "artist", "note"], notes_rows
+        )
 
-        .export-card {
-            background-color: #202020;
-            border-radius: 12px;
-            padding: 0.8rem 0.9rem 0.95rem 0.9rem;
-            border: 1px solid #333333;
-            box-shadow: 0 2px 6px rgba(0,0,0,0.45);
-            text-align: center;
-        }
+    return {
+        "csv": csv_data,
+        "json_pretty": favorites_json_pretty,
+        "code": collection_code,
+        "notes_csv": notes_csv_data,
+        "notes_json": dumps_json(notes_dict, pretty=True),
+        "notes_count": len(notes_rows),
+    }
 
-        .export-card h4 { margin: 0 0 0.4rem 0; font-size: 0.95rem; }
-        .export-card p { font-size: 0.8rem; color: #c7c7c7; margin-bottom: 0.6rem; }
 
-        .rijks-footer {
-            margin-top: 2.5rem;
-            padding-top: 0.75rem;
-            border-top: 1px solid #262626;
-            font-size: 0.8rem;
-            color: #aaaaaa;
-            text-align: center;
-        }
+def get_selection_exports(favorites_dict: dict, notes_dict: dict) -> dict:
+    """
+    Return the serialized exports (see build_selection_exports), cached in
+    session_state["selection_exports"].
 
-        /* =========================================
-           Gallery card micro-refinements
-        ========================================= */
+    The cache key is a digest of the compact JSON of favorites and notes, so
+    any change (including comparison flags) rebuilds the exports, while
+    reruns that do not touch them reuse the serialized output.
+    """
+    favorites_compact = dumps_json(favorites_dict)
 
-        .rijks-card-title {
-            font-size: 0.95rem;
-            line-height: 1.25;
-            margin-top: 0.5rem;
-            color: #f1f1f1;
-        }
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(favorites_compact)
+    digest.update(b"\0")
+    digest.update(dumps_json(notes_dict))
+    exports_key = digest.digest()
 
-        .rijks-card-caption {
-            font-size: 0.8rem;
-            color: #b8b8b8;
-            margin-bottom: 0.25rem;
-        }
+    cached = st.session_state.get("selection_exports")
+    if cached is None or cached[0] != exports_key:
+        exports = build_selection_exports(favorites_dict, notes_dict, favorites_compact)
+        cached = (exports_key, exports)
+        st.session_state["selection_exports"] = cached
 
-        .rijks-card:hover {
-            background-color: rgba(255, 255, 255, 0.02);
-        }
+    return cached[1]
 
-        /* Highlight for artworks marked as comparison candidates */
-        .rijks-card-compare-candidate {
-            border-color: #ffb347;
-            box-shadow:
-                0 0 0 1px #ffb347,
-                0 4px 14px rgba(0, 0, 0, 0.9);
-            position: relative;
-        }
 
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+# ============================================================
+# Custom CSS & footer
+# ============================================================
+def inject_custom_css() -> None:
+    """Inject dark-mode layout and gallery card styling."""
+    st.html(SELECTION_CSS_HTML)
 
 
 def show_footer() -> None:
@@ -418,6 +505,153 @@ inject_custom_css()
 # ============================================================
 # PDF builder (illustrated)
 # ============================================================
+# Line wrapping for PDF text (90 characters fits the A4 text width at
+# 10-11 pt Helvetica); one wrapper is reused instead of textwrap.wrap
+# building a new one for every block
+_PDF_TEXT_WRAPPER = TextWrapper(width=90)
+
+# Parallel downloads for the PDF thumbnails
+_PDF_IMAGE_WORKERS = 16
+
+# Size limit of the on-disk image cache (least recently used files go first)
+_IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# PDF thumbnails are drawn in a 170x170 pt box; images are downscaled to
+# twice that so they stay sharp in print without embedding the full-size JPEG
+_PDF_THUMB_PX = 340
+_PDF_THUMB_QUALITY = 75
+
+
+def _image_cache_path(img_url: str) -> Path:
+    """Return the cache file for an image URL (sha1 of the URL + thumbnail size)."""
+    digest = hashlib.sha1(img_url.encode("utf-8")).hexdigest()
+    return IMAGE_CACHE_DIR / f"{digest}-{_PDF_THUMB_PX}.bin"
+
+
+def _shrink_for_pdf(data: bytes) -> bytes:
+    """
+    Downscale an image to fit _PDF_THUMB_PX and re-encode it as JPEG.
+
+    Images that are already small enough (or when Pillow is not installed)
+    are returned unchanged.
+    """
+    if not PIL_AVAILABLE:
+        return data
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        if max(img.size) <= _PDF_THUMB_PX * 1.1:
+            return data
+
+        thumb = img.convert("RGB")
+        thumb.thumbnail((_PDF_THUMB_PX, _PDF_THUMB_PX), Image.LANCZOS)
+
+    out = io.BytesIO()
+    thumb.save(out, format="JPEG", quality=_PDF_THUMB_QUALITY)
+    return out.getvalue()
+
+
+def _fetch_image_bytes(session: requests.Session, img_url: str) -> bytes:
+    """
+    Return the PDF-sized bytes of an image (see _shrink_for_pdf), from
+    IMAGE_CACHE_DIR when available, otherwise downloaded, downscaled and
+    stored there for the next PDF build (only when Pillow is installed).
+    """
+    cache_path = _image_cache_path(img_url)
+    try:
+        data = cache_path.read_bytes()
+        os.utime(cache_path)  # mark as recently used for trim_image_cache
+        return data
+    except OSError:
+        pass
+
+    resp = session.get(img_url, timeout=8)
+    resp.raise_for_status()
+    data = _shrink_for_pdf(resp.content)
+
+    # Without Pillow the image is full size: caching it under the thumbnail
+    # name would keep serving it unshrunk once Pillow is installed
+    if not PIL_AVAILABLE:
+        return data
+
+    # Write to a temporary file first so a partial image is never cached
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+    return data
+
+
+def trim_image_cache(max_bytes: int = _IMAGE_CACHE_MAX_BYTES) -> None:
+    """Delete the least recently used cached images until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    for path in IMAGE_CACHE_DIR.glob("*.bin"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    if total <= max_bytes:
+        return
+
+    for _mtime, size, path in sorted(entries):
+        path.unlink(missing_ok=True)
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+def _fetch_pdf_image(session: requests.Session, img_url: str):
+    """Load one thumbnail and wrap it in an ImageReader (None on failure)."""
+    from reportlab.lib.utils import ImageReader
+
+    try:
+        return ImageReader(io.BytesIO(_fetch_image_bytes(session, img_url)))
+    except Exception:
+        return None
+
+
+def fetch_pdf_images(favorites: dict) -> dict:
+    """
+    Download the thumbnails of all favorites concurrently.
+
+    Returns {objectNumber: ImageReader or None} for every artwork with an
+    image URL. Images already in the disk cache are not downloaded again;
+    one requests.Session is shared by the worker threads so connections to
+    the image host are reused.
+    """
+    urls = {
+        obj_num: img_url
+        for obj_num, art in favorites.items()
+        if (img_url := get_best_image_url(art))
+    }
+    if not urls:
+        return {}
+
+    workers = min(_PDF_IMAGE_WORKERS, len(urls))
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                obj_num: pool.submit(_fetch_pdf_image, session, img_url)
+                for obj_num, img_url in urls.items()
+            }
+            images = {obj_num: future.result() for obj_num, future in futures.items()}
+
+    trim_image_cache()
+    return images
+
+
 def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
     """
     Build an illustrated PDF (one artwork per page) using ReportLab.
@@ -428,6 +662,9 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
     if not REPORTLAB_AVAILABLE or not favorites:
         return None
 
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
     pdf_meta = load_pdf_meta()
     include_cover = bool(pdf_meta.get("include_cover", True))
     include_opening_text = bool(pdf_meta.get("include_opening_text", True))
@@ -476,7 +713,7 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
         y = y_start - 18
         c.setFont("Helvetica", 10)
 
-        for line in wrap(text, width=90):
+        for line in _PDF_TEXT_WRAPPER.wrap(text):
             if y < margin_bottom + 20:
                 # New page when we run out of vertical space
                 draw_footer()
@@ -515,7 +752,7 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
         y = margin_top - 35
         c.setFont("Helvetica", 11)
 
-        for line in wrap(opening_text_cfg, width=90):
+        for line in _PDF_TEXT_WRAPPER.wrap(opening_text_cfg):
             if y < margin_bottom + 20:
                 draw_footer()
                 c.showPage()
@@ -541,7 +778,7 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
         maker = art.get("principalOrFirstMaker", "Unknown artist")
         line = f"{idx}. {title} — {maker} (ID: {obj_num})"
 
-        for wrapped_line in wrap(line, width=90):
+        for wrapped_line in _PDF_TEXT_WRAPPER.wrap(line):
             if y < margin_bottom + 20:
                 draw_footer()
                 c.showPage()
@@ -555,7 +792,9 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
     draw_footer()
     c.showPage()
 
-    # 4) One artwork per page
+    # 4) One artwork per page (thumbnails are downloaded up front, in parallel)
+    images = fetch_pdf_images(favorites)
+
     for idx, (obj_num, art) in enumerate(favorites.items(), start=1):
         c.setFont("Helvetica-Bold", 18)
         c.drawString(margin_left, margin_top, "Rijksmuseum Selection")
@@ -567,7 +806,7 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
         dating = art.get("dating", {}) or {}
         date = dating.get("presentingDate") or dating.get("year") or ""
         link = art.get("links", {}).get("web", "")
-        img_url = get_best_image_url(art)
+        img_reader = images.get(obj_num)
 
         thumb_w, thumb_h = 170, 170
         x_image = margin_left
@@ -578,13 +817,8 @@ def build_pdf_buffer(favorites: dict, notes: dict) -> bytes | None:
         image_drawn = False
 
         # Thumbnail
-        if img_url:
+        if img_reader is not None:
             try:
-                resp = requests.get(img_url, timeout=8)
-                resp.raise_for_status()
-                image_data = io.BytesIO(resp.content)
-                img_reader = ImageReader(image_data)
-
                 iw, ih = img_reader.getSize()
                 ratio = min(thumb_w / iw, thumb_h / ih)
                 draw_w, draw_h = iw * ratio, ih * ratio
@@ -672,15 +906,7 @@ st.caption(
 # Load favorites & notes from local files
 # ============================================================
 if "favorites" not in st.session_state:
-    if FAV_FILE.exists():
-        try:
-            with open(FAV_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                st.session_state["favorites"] = data if isinstance(data, dict) else {}
-        except Exception:
-            st.session_state["favorites"] = {}
-    else:
-        st.session_state["favorites"] = {}
+    st.session_state["favorites"] = read_json_file(FAV_FILE)
 
 favorites: dict = st.session_state["favorites"]
 
@@ -717,11 +943,7 @@ if len(candidate_ids_all) > 4:
             favorites[obj_num] = art
 
     st.session_state["favorites"] = favorites
-    try:
-        with open(FAV_FILE, "w", encoding="utf-8") as f:
-            json.dump(favorites, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    save_favorites(st.session_state["favorites"], st.session_state)
 
 # ============================================================
 # Comparison candidates helper
@@ -784,7 +1006,9 @@ if not favorites:
 # ============================================================
 # Selection statistics summary
 # ============================================================
-stats = compute_selection_stats(favorites)
+selection_index = get_selection_index(favorites)
+stats = selection_index["stats"]
+selection_years: dict = selection_index["years"]
 
 noted_ids = [
     obj_num
@@ -964,10 +1188,11 @@ filters_active = any(
 filtered_favorites: dict = favorites
 if filters_active:
     filtered_favorites = {
-        obj_num: art
-        for obj_num, art in favorites.items()
-        if passes_selection_filters(
-            art=art,
+        obj_num: favorites[obj_num]
+        for obj_num in filter_selection_rows(
+            selection_index["rows"],
+            selection_index["corpus"],
+            selection_index["starts"],
             text_filter=text_filter,
             year_min=year_min,
             year_max=year_max,
@@ -986,76 +1211,34 @@ else:
 # ============================================================
 # Export panel (CSV / JSON / PDF / share code / notes exports)
 # ============================================================
-st.markdown('<div class="rijks-export-panel">', unsafe_allow_html=True)
-st.markdown("### Export & share selection")
-
-# Build base CSV with artworks in the selection
-rows: list[list[str]] = []
-for obj_num, art in favorites.items():
-    title = art.get("title", "")
-    maker = art.get("principalOrFirstMaker", "")
-    dating = art.get("dating", {}) or {}
-    date = dating.get("presentingDate") or dating.get("year") or ""
-    link = art.get("links", {}).get("web", "")
-
-    # NEW: flag indicando se esta obra tem nota de pesquisa
-    note_text = notes.get(obj_num, "")
-    has_note = isinstance(note_text, str) and note_text.strip() != ""
-
-    rows.append([obj_num, title, maker, date, link, has_note])
+def render_export_card_header(title: str, description: str) -> None:
+    """
+    Render the heading of an export card in a single markdown element.
 
-csv_data = None
-if rows:
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(
-        ["objectNumber", "title", "artist", "date", "web_link", "has_notes"]
+    Each st.markdown call is its own element (an unclosed div is closed
+    right away), so the card, its title and its description must be emitted
+    together for the .export-card styles to apply.
+    """
+    st.markdown(
+        f'<div class="export-card"><h4>{title}</h4><p>{description}</p></div>',
+        unsafe_allow_html=True,
     )
-    writer.writerows(rows)
-    csv_data = buffer.getvalue()
-
-# Full favorites JSON (pretty + compact)
-favorites_json_pretty = json.dumps(favorites, ensure_ascii=False, indent=2)
-favorites_json_compact = json.dumps(favorites, ensure_ascii=False)
-
-# Collection code (base64 of compact JSON)
-collection_code = base64.b64encode(
-    favorites_json_compact.encode("utf-8")
-).decode("ascii")
-
-# Notes exports (CSV + JSON)
-notes_rows: list[list[str]] = []
-for obj_num, art in favorites.items():
-    note_text = notes.get(obj_num, "")
-    note_text = note_text.strip() if isinstance(note_text, str) else ""
-    if not note_text:
-        continue
 
-    title = art.get("title", "")
-    maker = art.get("principalOrFirstMaker", "")
-    notes_rows.append([obj_num, title, maker, note_text])
 
-notes_csv_data = None
-if notes_rows:
-    notes_buffer = io.StringIO()
-    notes_writer = csv.writer(notes_buffer)
-    notes_writer.writerow(["objectNumber", "title", "artist", "note"])
-    notes_writer.writerows(notes_rows)
-    notes_csv_data = notes_buffer.getvalue()
+st.markdown('<div class="rijks-export-panel">', unsafe_allow_html=True)
+st.markdown("### Export & share selection")
 
-notes_json = json.dumps(notes, ensure_ascii=False, indent=2)
+exports = get_selection_exports(favorites, notes)
 
 col1, col2, col3, col4 = st.columns(4)
 
 # ----- CSV export -----
 with col1:
-    st.markdown('<div class="export-card">', unsafe_allow_html=True)
-    st.markdown("<h4>CSV</h4>", unsafe_allow_html=True)
-    st.markdown("<p>Table format for Excel/Sheets.</p>", unsafe_allow_html=True)
-    if csv_data:
+    render_export_card_header("CSV", "Table format for Excel/Sheets.")
+    if exports["csv"]:
         clicked = st.download_button(
             "📄 Download CSV",
-            csv_data,
+            exports["csv"],
             "rijks_selection.csv",
             "text/csv",
             key="dl_selection_csv",
@@ -1068,16 +1251,13 @@ with col1:
             )
     else:
         st.caption("No data.")
-    st.markdown("</div>", unsafe_allow_html=True)
 
 # ----- JSON export -----
 with col2:
-    st.markdown('<div class="export-card">', unsafe_allow_html=True)
-    st.markdown("<h4>JSON</h4>", unsafe_allow_html=True)
-    st.markdown("<p>For scripts, apps and APIs.</p>", unsafe_allow_html=True)
+    render_export_card_header("JSON", "For scripts, apps and APIs.")
     clicked = st.download_button(
         "🧾 Download JSON",
-        favorites_json_pretty,
+        exports["json_pretty"],
         "rijks_selection.json",
         "application/json",
         key="dl_selection_json",
@@ -1088,13 +1268,10 @@ with col2:
             page="My_Selection",
             props={"format": "json", "scope": "selection", "count": len(favorites)},
         )
-    st.markdown("</div>", unsafe_allow_html=True)
 
 # ----- PDF export -----
 with col3:
-    st.markdown('<div class="export-card">', unsafe_allow_html=True)
-    st.markdown("<h4>PDF</h4>", unsafe_allow_html=True)
-    st.markdown("<p>Printable report of your selection.</p>", unsafe_allow_html=True)
+    render_export_card_header("PDF", "Printable report of your selection.")
 
     # NEW: escolher o escopo do PDF
     pdf_scope = st.radio(
@@ -1178,21 +1355,16 @@ with col3:
                 props={"format": "pdf", "scope": "selection", "count": len(favorites)},
             )
 
-    st.markdown("</div>", unsafe_allow_html=True)
-
 # ----- Share code + notes exports -----
 with col4:
-    st.markdown('<div class="export-card">', unsafe_allow_html=True)
-    st.markdown("<h4>Share & notes</h4>", unsafe_allow_html=True)
-    st.markdown(
-        "<p>Share your selection and export research notes.</p>",
-        unsafe_allow_html=True,
+    render_export_card_header(
+        "Share & notes", "Share your selection and export research notes."
     )
 
-    # Selection sharing via base64 code
+    # Selection sharing via collection code
     with st.expander("🔗 Share selection code", expanded=False):
         st.caption("Copy this code to share your selection with another user:")
-        st.code(collection_code, language=None)
+        st.code(exports["code"], language=None)
 
         import_code = st.text_area(
             "Collection code to import",
@@ -1204,19 +1376,17 @@ with col4:
         if st.button("Load selection from code"):
             if not import_code.strip():
                 st.warning("Please paste a collection code first.")
+            elif "".join(import_code.split()) == exports["code"]:
+                # Re-importing our own code: nothing to decode or save
+                st.info("This code matches your current selection.")
             else:
                 try:
-                    decoded = base64.b64decode(import_code.encode("ascii")).decode(
-                        "utf-8"
-                    )
-                    data = json.loads(decoded)
+                    data = decode_collection_code(import_code)
                     if isinstance(data, dict):
                         st.session_state["favorites"] = data
-                        try:
-                            with open(FAV_FILE, "w", encoding="utf-8") as f:
-                                json.dump(data, f, ensure_ascii=False, indent=2)
-                        except Exception:
-                            pass
+                        # Same objectNumbers may come back with other metadata
+                        st.session_state.pop("fav_search_index", None)
+                        save_favorites(st.session_state["favorites"], st.session_state)
                         st.success("Selection loaded successfully from code.")
                         st.rerun()
                     else:
@@ -1230,10 +1400,10 @@ with col4:
             "Download your research notes for use in Excel/Sheets or in other tools."
         )
 
-        if notes_csv_data:
+        if exports["notes_csv"]:
             clicked = st.download_button(
                 "📄 Download notes (CSV)",
-                notes_csv_data,
+                exports["notes_csv"],
                 "rijks_notes.csv",
                 "text/csv",
                 key="dl_notes_csv",
@@ -1245,7 +1415,7 @@ with col4:
                     props={
                         "format": "csv",
                         "scope": "notes",
-                        "count": len(notes_rows),
+                        "count": exports["notes_count"],
                     },
                 )
         else:
@@ -1253,7 +1423,7 @@ with col4:
 
         clicked = st.download_button(
             "🧾 Download notes (JSON)",
-            notes_json,
+            exports["notes_json"],
             "rijks_notes.json",
             "application/json",
             key="dl_notes_json",
@@ -1265,12 +1435,10 @@ with col4:
                 props={
                     "format": "json",
                     "scope": "notes",
-                    "count": len(notes_rows),
+                    "count": exports["notes_count"],
                 },
             )
 
-    st.markdown("</div>", unsafe_allow_html=True)
-
 st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -1280,13 +1448,10 @@ st.markdown("</div>", unsafe_allow_html=True)
 if st.button("Clear my entire selection"):
     # Clear in-memory favorites
     st.session_state["favorites"] = {}
+    st.session_state.pop("fav_search_index", None)
     favorites = {}
 
-    try:
-        with open(FAV_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    save_favorites(st.session_state["favorites"], st.session_state)
 
     # When clearing everything, also reset comparison checkbox key generation
     st.session_state["cmp_key_generation"] = st.session_state.get(
@@ -1306,37 +1471,49 @@ if st.button("Clear my entire selection"):
 # ============================================================
 # Gallery + comparison logic helpers
 # ============================================================
-def get_year_for_sort(art: dict):
-    """Return a numeric year for sorting (when available) to support year-based ordering."""
-    dating = art.get("dating") or {}
-    y = dating.get("year")
-    if isinstance(y, int):
-        return y
-    pd = dating.get("presentingDate")
-    if isinstance(pd, str) and len(pd) >= 4 and pd[:4].isdigit():
-        try:
-            return int(pd[:4])
-        except Exception:
-            return None
-    return None
+def get_year_for_sort(obj_num: str) -> int | None:
+    """Return the precomputed year of an artwork for year-based ordering."""
+    return selection_years.get(obj_num)
+
 
+def year_sort_key(item: tuple[str, dict]) -> tuple:
+    """Sort key for "Year (oldest → newest)": one year lookup, unknown years last."""
+    year = selection_years.get(item[0])
+    return (year is None, year or 10**9)
 
-def has_note_text(obj_num: str) -> bool:
-    """Return True if the artwork has a non-empty research note."""
-    txt = notes.get(obj_num, "")
-    return isinstance(txt, str) and txt.strip() != ""
 
+def year_desc_sort_key(item: tuple[str, dict]) -> tuple:
+    """Sort key for "Year (newest → oldest)": one year lookup, unknown years last."""
+    year = selection_years.get(item[0])
+    return (year is None, -(year or -10**9))
 
-def has_note(obj_id: str) -> bool:
-    """Alias for has_note_text (kept for clarity in filters)."""
-    txt = notes.get(obj_id, "")
-    return isinstance(txt, str) and txt.strip() != ""
+
+# objectNumbers with a non-empty research note, computed once per run so the
+# sorts, filters and cards below only need a set lookup
+notes_nonempty: set[str] = {
+    obj_num
+    for obj_num, txt in notes.items()
+    if isinstance(txt, str) and txt.strip() != ""
+}
 
 
 # ------------------------------------------------------------
-# Base items = favorites after metadata filters
+# Base items = favorites after metadata filters, then the notes
+# filters (with / without notes, keyword inside notes) in one pass
 # ------------------------------------------------------------
-base_items: list[tuple[str, dict]] = list(filtered_favorites.items())
+base_items: list[tuple[str, dict]] = []
+for obj_num, art in filtered_favorites.items():
+    has_notes = obj_num in notes_nonempty
+    if selection_filter_code == "with_notes" and not has_notes:
+        continue
+    if selection_filter_code == "without_notes" and has_notes:
+        continue
+    # A keyword match implies a non-empty note
+    if note_filter_lower and not (
+        has_notes and note_filter_lower in notes[obj_num].lower()
+    ):
+        continue
+    base_items.append((obj_num, art))
 
 # -----------------------------
 # Global sorting over base_items
@@ -1356,48 +1533,18 @@ elif sort_label == "Title (A–Z)":
         )
     )
 elif sort_label == "Year (oldest → newest)":
-    base_items.sort(
-        key=lambda item: (
-            get_year_for_sort(item[1]) is None,
-            get_year_for_sort(item[1]) or 10**9,
-        )
-    )
+    base_items.sort(key=year_sort_key)
 elif sort_label == "Year (newest → oldest)":
-    base_items.sort(
-        key=lambda item: (
-            get_year_for_sort(item[1]) is None,
-            -(get_year_for_sort(item[1]) or -10**9),
-        )
-    )
+    base_items.sort(key=year_desc_sort_key)
 elif sort_label == "Notes first":
     base_items.sort(
         key=lambda item: (
-            not has_note_text(item[0]),
+            item[0] not in notes_nonempty,
             item[1].get("principalOrFirstMaker", ""),
             item[1].get("title", ""),
         )
     )
 
-# -----------------------------
-# Filter by keyword inside notes
-# -----------------------------
-if note_filter_lower:
-    base_items = [
-        (obj_num, art)
-        for obj_num, art in base_items
-        if note_filter_lower in (notes.get(obj_num, "") or "").lower()
-    ]
-
-# -----------------------------
-# High-level filter: with / without notes
-# -----------------------------
-if selection_filter_code == "with_notes":
-    base_items = [(obj_num, art) for obj_num, art in base_items if has_note(obj_num)]
-elif selection_filter_code == "without_notes":
-    base_items = [
-        (obj_num, art) for obj_num, art in base_items if not has_note(obj_num)
-    ]
-
 # ------------------------------------------------------------
 # Summary after all filters (metadata + notes)
 # ------------------------------------------------------------
@@ -1502,11 +1649,7 @@ else:
 
                 # Persist updated favorites to disk
                 st.session_state["favorites"] = favorites
-                try:
-                    with open(FAV_FILE, "w", encoding="utf-8") as f:
-                        json.dump(favorites, f, ensure_ascii=False, indent=2)
-                except Exception:
-                    pass
+                save_favorites(st.session_state["favorites"], st.session_state)
 
                 # Clear in-memory list of comparison candidates
                 st.session_state["compare_candidates"] = []
@@ -1583,12 +1726,7 @@ else:
         # Atualiza favorites em memória e em disco
         favorites[obj_num] = art
         st.session_state["favorites"] = favorites
-        try:
-            with open(FAV_FILE, "w", encoding="utf-8") as f:
-                json.dump(favorites, f, ensure_ascii=False, indent=2)
-        except Exception:
-            # nunca quebrar a UI por erro de disco
-            pass
+        save_favorites(st.session_state["favorites"], st.session_state)
 
 
     def render_cards(items: list[tuple[str, dict]], allow_compare: bool):
@@ -1609,8 +1747,7 @@ else:
 
             for col, (obj_num, art) in zip(cols, row_items):
                 with col:
-                    note_for_this = notes.get(obj_num, "")
-                    has_notes_flag = isinstance(note_for_this, str) and note_for_this.strip()
+                    has_notes_flag = obj_num in notes_nonempty
 
                     # Base card classes
                     card_classes = "rijks-card"
@@ -1627,7 +1764,7 @@ else:
                         f'<div class="{card_classes}">', unsafe_allow_html=True
                     )
 
-                    img_url = cached_best_image_url(art)
+                    img_url = get_best_image_url(art)
 
                     # Thumbnail area
                     if show_images:
@@ -1653,12 +1790,10 @@ else:
                     presenting_date = dating.get("presentingDate")
                     year = dating.get("year")
 
+                    # Title + artist in a single markdown call (values HTML-escaped)
                     st.markdown(
-                        f'<div class="rijks-card-title">{title}</div>',
-                        unsafe_allow_html=True,
-                    )
-                    st.markdown(
-                        f'<div class="rijks-card-caption">{maker}</div>',
+                        f'<div class="rijks-card-title">{html.escape(str(title))}</div>'
+                        f'<div class="rijks-card-caption">{html.escape(str(maker))}</div>',
                         unsafe_allow_html=True,
                     )
 
@@ -1732,13 +1867,7 @@ else:
                             props={
                                 "object_id": obj_num,
                                 "artist": art.get("principalOrFirstMaker"),
-                                "had_notes": bool(
-                                    (
-                                        st.session_state.get("notes", {})
-                                        .get(obj_num, "")
-                                        .strip()
-                                    )
-                                ),
+                                "had_notes": obj_num in notes_nonempty,
                                 "prev_count": len(favorites),
                                 "origin": "card",
                             },
@@ -1748,29 +1877,19 @@ else:
                         favorites.pop(obj_num, None)
                         st.session_state["favorites"] = favorites
 
-                        try:
-                            with open(FAV_FILE, "w", encoding="utf-8") as f:
-                                json.dump(favorites, f, ensure_ascii=False, indent=2)
-                        except Exception:
-                            pass
+                        save_favorites(st.session_state["favorites"], st.session_state)
 
                         # If this artwork was open in detail view, close it
                         if st.session_state.get("detail_art_id") == obj_num:
                             st.session_state["detail_art_id"] = None
 
-                        # Remove notes for this artwork as well
-                        if "notes" in st.session_state:
-                            st.session_state["notes"].pop(obj_num, None)
-                            try:
-                                with open(NOTES_FILE, "w", encoding="utf-8") as f:
-                                    json.dump(
-                                        st.session_state["notes"],
-                                        f,
-                                        ensure_ascii=False,
-                                        indent=2,
-                                    )
-                            except Exception:
-                                pass
+                        # Remove notes for this artwork as well (only rewrite
+                        # the notes file when there was a note to drop)
+                        if (
+                            "notes" in st.session_state
+                            and st.session_state["notes"].pop(obj_num, None) is not None
+                        ):
+                            save_notes()
 
                         st.success("Artwork removed from your selection.")
                         st.rerun()
@@ -1818,11 +1937,12 @@ else:
             key="enable_compare_grouped_toggle",
         )
 
-        # Group artworks by artist
-        grouped: dict[str, list[tuple[str, dict]]] = {}
+        # Group artworks by artist (single pass)
+        grouped: dict[str, list[tuple[str, dict]]] = defaultdict(list)
         for obj_num, art in base_items:
-            artist = art.get("principalOrFirstMaker") or "Unknown artist"
-            grouped.setdefault(artist, []).append((obj_num, art))
+            grouped[art.get("principalOrFirstMaker") or "Unknown artist"].append(
+                (obj_num, art)
+            )
 
         artist_names = sorted(grouped.keys(), key=lambda x: x.lower())
 
@@ -1857,23 +1977,13 @@ else:
                     )
                 )
             elif sort_within_artist == "Year (oldest → newest)":
-                items.sort(
-                    key=lambda it: (
-                        get_year_for_sort(it[1]) is None,
-                        get_year_for_sort(it[1]) or 10 ** 9,
-                    )
-                )
+                items.sort(key=year_sort_key)
             elif sort_within_artist == "Year (newest → oldest)":
-                items.sort(
-                    key=lambda it: (
-                        get_year_for_sort(it[1]) is None,
-                        -(get_year_for_sort(it[1]) or -10 ** 9),
-                    )
-                )
+                items.sort(key=year_desc_sort_key)
             elif sort_within_artist == "Notes first":
                 items.sort(
                     key=lambda it: (
-                        not has_note_text(it[0]),
+                        it[0] not in notes_nonempty,
                         it[1].get("title", ""),
                     )
                 )
@@ -1887,11 +1997,18 @@ else:
             sort_items_for_artist(items)
             visible_items.extend(items)
 
-            years = [get_year_for_sort(a) for _, a in items]
-            years = [y for y in years if isinstance(y, int)]
-            min_y = min(years) if years else None
-            max_y = max(years) if years else None
-            notes_count = sum(1 for obj_id, _ in items if has_note_text(obj_id))
+            # Year range and notes count in a single pass over the group
+            min_y = max_y = None
+            notes_count = 0
+            for obj_id, _ in items:
+                if obj_id in notes_nonempty:
+                    notes_count += 1
+                year = get_year_for_sort(obj_id)
+                if year is not None:
+                    if min_y is None or year < min_y:
+                        min_y = year
+                    if max_y is None or year > max_y:
+                        max_y = year
 
             subtitle_parts = [
                 f"{len(items)} artwork(s)",
@@ -2102,24 +2219,11 @@ if detail_id and detail_id in favorites:
         favorites.pop(detail_id, None)
         st.session_state["favorites"] = favorites
 
-        try:
-            with open(FAV_FILE, "w", encoding="utf-8") as f:
-                json.dump(favorites, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+        save_favorites(st.session_state["favorites"], st.session_state)
 
         if "notes" in st.session_state:
             st.session_state["notes"].pop(detail_id, None)
-            try:
-                with open(NOTES_FILE, "w", encoding="utf-8") as f:
-                    json.dump(
-                        st.session_state["notes"],
-                        f,
-                        ensure_ascii=False,
-                        indent=2,
-                    )
-            except Exception:
-                pass
+            save_notes()
 
         st.session_state["detail_art_id"] = None
 
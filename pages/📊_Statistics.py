@@ -32,6 +32,7 @@ Key features
     top artworks, top artists, page views and search queries.
 """
 
+import gzip
 import json
 import io
 import csv
@@ -42,6 +43,7 @@ from typing import Optional
 import streamlit as st
 
 from app_paths import ANALYTICS_EVENTS_FILE, ANALYTICS_CONFIG_FILE
+from analytics import flush_events, list_event_archives
 
 
 # ============================================================
@@ -49,7 +51,8 @@ from app_paths import ANALYTICS_EVENTS_FILE, ANALYTICS_CONFIG_FILE
 # ============================================================
 def clear_analytics_events() -> bool:
     """
-    Reset the analytics events file to an empty file.
+    Reset the analytics events file to an empty file and delete its
+    rotated (gzip) archives.
 
     Returns
     -------
@@ -57,6 +60,9 @@ def clear_analytics_events() -> bool:
         True if the file was successfully cleared, False otherwise.
     """
     try:
+        # Write out buffered events first so they are cleared too
+        flush_events()
+
         p = ANALYTICS_EVENTS_FILE
         p.parent.mkdir(parents=True, exist_ok=True)
 
@@ -64,6 +70,10 @@ def clear_analytics_events() -> bool:
         with open(p, "w", encoding="utf-8") as f:
             f.write("")
 
+        # rotated archives are part of the same history
+        for archive in list_event_archives():
+            archive.unlink()
+
         return True
     except Exception:
         return False
@@ -157,18 +167,35 @@ require_admin_access()
 # ============================================================
 # Helpers: loading and exporting events
 # ============================================================
+def _read_event_lines(f, events: list[dict]) -> None:
+    """Parse JSON lines from an open text file into `events`."""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except Exception:
+            # Skip malformed lines, but never break the page
+            continue
+
+
 @st.cache_data(show_spinner=False)
-def load_events(path, version: float) -> list[dict]:
+def load_events(path, version: tuple) -> list[dict]:
     """
     Load analytics events from the given file as a list of dicts.
 
+    Rotated gzip archives (see analytics.list_event_archives) are read
+    first, streaming-decompressed, so events stay in chronological order.
+
     Parameters
     ----------
     path:
         Path to the analytics events file.
     version:
-        File modification time (mtime). This is used only as a cache key
-        so that Streamlit invalidates the cache when the file changes.
+        (name, mtime, size) of the events file and its archives. This is used only
+        as a cache key so that Streamlit invalidates the cache when any of
+        them changes.
 
     Returns
     -------
@@ -176,22 +203,35 @@ def load_events(path, version: float) -> list[dict]:
         List of parsed event records.
     """
     events: list[dict] = []
+
+    for archive in list_event_archives():
+        try:
+            with gzip.open(archive, "rt", encoding="utf-8") as f:
+                _read_event_lines(f, events)
+        except Exception:
+            # A damaged archive should not hide the rest of the history
+            continue
+
     if not path.exists():
         return events
 
     with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                events.append(json.loads(line))
-            except Exception:
-                # Skip malformed lines, but never break the page
-                continue
+        _read_event_lines(f, events)
     return events
 
 
+def events_files_version() -> tuple:
+    """Return the (name, mtime, size) signature of the events file and its archives."""
+    version = []
+    for events_file in [*list_event_archives(), ANALYTICS_EVENTS_FILE]:
+        try:
+            stat = events_file.stat()
+        except OSError:
+            continue
+        version.append((events_file.name, stat.st_mtime, stat.st_size))
+    return tuple(version)
+
+
 def events_to_csv_bytes(events: list[dict]) -> bytes:
     """
     Convert a list of event dicts into CSV bytes.
@@ -234,8 +274,10 @@ def events_to_csv_bytes(events: list[dict]) -> bytes:
 # ============================================================
 # Load events and show basic debug info
 # ============================================================
-p = ANALYTICS_EVENTS_FILE
-version = p.stat().st_mtime if p.exists() else 0.0
+# Events are buffered in memory by analytics.py; write them out first
+flush_events()
+
+version = events_files_version()
 
 events = load_events(ANALYTICS_EVENTS_FILE, version)
 
@@ -15,11 +15,11 @@ Settings are stored in a small JSON file (PDF_META_FILE) and are
 shared with the My_Selection page.
 """
 
-import json
 import streamlit as st
 
 from app_paths import PDF_META_FILE, FAV_FILE
 from analytics import track_event, track_event_once
+from local_store import dumps_json, read_json_file, write_bytes_atomic
 
 
 # ============================================================
@@ -136,15 +136,8 @@ def load_pdf_meta() -> dict:
 
     base = _default_pdf_meta()
 
-    if PDF_META_FILE.exists():
-        try:
-            with open(PDF_META_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                base.update(data)
-        except Exception:
-            # PDF meta is optional; never break the app here
-            pass
+    # PDF meta is optional; read_json_file returns {} when missing or invalid
+    base.update(read_json_file(PDF_META_FILE))
 
     st.session_state["pdf_meta"] = base
     return base
@@ -157,8 +150,8 @@ def save_pdf_meta(meta: dict) -> None:
     st.session_state["pdf_meta"] = base
 
     try:
-        with open(PDF_META_FILE, "w", encoding="utf-8") as f:
-            json.dump(base, f, ensure_ascii=False, indent=2)
+        payload = dumps_json(base, pretty=True)
+        write_bytes_atomic(PDF_META_FILE, payload)
     except Exception:
         # Never break the UI because of a save error
         pass
@@ -175,15 +168,7 @@ def load_selection_count() -> int:
     if isinstance(favorites, dict):
         return len(favorites)
 
-    try:
-        if FAV_FILE.exists():
-            with open(FAV_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return len(data) if isinstance(data, dict) else 0
-    except Exception:
-        pass
-
-    return 0
+    return len(read_json_file(FAV_FILE))
 
 
 # ============================================================
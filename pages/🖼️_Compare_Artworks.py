@@ -1,10 +1,9 @@
-import json
-
 import streamlit as st
 
 from app_paths import FAV_FILE
 from rijks_api import get_best_image_url
 from analytics import track_event
+from local_store import read_json_file, save_favorites
 
 
 # ============================================================
@@ -153,15 +152,7 @@ def inject_custom_css() -> None:
 # ============================================================
 def load_favorites_from_disk() -> dict:
     """Load favorites from the local JSON file if needed."""
-    if FAV_FILE.exists():
-        try:
-            with open(FAV_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if isinstance(data, dict):
-                    return data
-        except Exception:
-            return {}
-    return {}
+    return read_json_file(FAV_FILE)
 
 
 def get_compare_candidates_from_favorites(favorites: dict) -> list[str]:
@@ -215,11 +206,7 @@ if clear_all_requested:
 
     if changed:
         st.session_state["favorites"] = favorites
-        try:
-            with open(FAV_FILE, "w", encoding="utf-8") as f:
-                json.dump(favorites, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+        save_favorites(favorites, st.session_state)
 
     # Clear all local comparison state as well
     st.session_state["cmp_pair_ids"] = []
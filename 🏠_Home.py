@@ -13,7 +13,7 @@ This is the main entry point of the app. It provides:
 - Analytics events for page views, searches and selection actions.
 """
 
-import json
+import html
 import io
 import csv
 import streamlit as st
@@ -21,6 +21,13 @@ import streamlit as st
 from app_paths import FAV_FILE, NOTES_FILE, HERO_IMAGE_PATH
 from analytics import track_event, track_event_once
 from rijks_api import search_artworks, extract_year, get_best_image_url
+from local_store import read_json_file, save_favorites
+from page_styles import (
+    EXPLORER_CSS_HTML,
+    EXPLORER_FOOTER_HTML,
+    EXPLORER_IMAGE_FAILED_HTML,
+    EXPLORER_NO_IMAGE_HTML,
+)
 
 
 # ============================================================
@@ -32,117 +39,36 @@ st.set_page_config(page_title="Rijksmuseum Explorer", page_icon="🎨", layout="
 # ============================================================
 # CSS & footer
 # ============================================================
-def inject_custom_css() -> None:
-    """Inject dark theme and card styling for the Explorer page."""
-    st.markdown(
-        """
-        <style>
-        .stApp { background-color: #111111; color: #f5f5f5; }
-        div.block-container { max-width: 1200px; padding-top: 1.5rem; padding-bottom: 3rem; }
-
-        section[data-testid="stSidebar"] { background-color: #181818 !important; }
-        section[data-testid="stSidebar"] h1,
-        section[data-testid="stSidebar"] h2,
-        section[data-testid="stSidebar"] h3,
-        section[data-testid="stSidebar"] label { color: #f5f5f5 !important; }
-
-        div[data-testid="stMarkdownContainer"] a { color: #ff9900 !important; text-decoration: none; }
-        div[data-testid="stMarkdownContainer"] a:hover { text-decoration: underline; }
-
-        .rijks-hero {
-            border-radius: 14px;
-            overflow: hidden;
-            box-shadow: 0 4px 18px rgba(0,0,0,0.6);
-            margin-bottom: 0.85rem;
-        }
+# Card fragments for the results grid. Only the per-artwork values change,
+# so each card fills in a template instead of assembling its markup.
+_CARD_HEADER_TMPL = (
+    '<div class="rijks-card-title">{title}</div>\n'
+    '<div class="rijks-card-caption">{maker}</div>'
+)
 
-        .rijks-summary-pill {
-            display: inline-block;
-            padding: 4px 10px;
-            border-radius: 999px;
-            background-color: #262626;
-            color: #f5f5f5;
-            font-size: 0.85rem;
-            margin-top: 0.35rem;
-            margin-bottom: 1.0rem;
-        }
-        .rijks-summary-pill strong { color: #ff9900; }
-
-        .rijks-card {
-            background-color: #181818;
-            border-radius: 12px;
-            padding: 0.75rem 0.75rem 0.9rem 0.75rem;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.4);
-            border: 1px solid #262626;
-            margin-bottom: 1rem;
-            margin-top: 0.35rem;
-        }
-        .rijks-card img {
-            width: 100%;
-            height: 260px;
-            object-fit: cover;
-            border-radius: 8px;
-        }
-        .rijks-card-title {
-            font-size: 1rem;
-            font-weight: 600;
-            margin-top: 0.35rem;
-            margin-bottom: 0.1rem;
-            min-height: 1.3rem;
-        }
-        .rijks-card-caption { font-size: 0.9rem; color: #c7c7c7; margin-bottom: 0.25rem; }
-
-        .rijks-badge-row { margin-top: 0.15rem; margin-bottom: 0.35rem; }
-        .rijks-badge {
-            display: inline-block;
-            padding: 2px 8px;
-            border-radius: 999px;
-            font-size: 0.73rem;
-            margin-right: 0.25rem;
-            background-color: #262626;
-            color: #f5f5f5;
-            border: 1px solid #333333;
-        }
-        .rijks-badge-primary { background-color: #ff9900; color: #111111; border-color: #ff9900; }
-        .rijks-badge-secondary { background-color: #262626; color: #ffddaa; border-color: #444444; }
-
-        .rijks-no-image-msg {
-            font-size: 0.8rem;
-            color: #cccccc;
-            background-color: #202020;
-            border-radius: 8px;
-            padding: 0.45rem 0.55rem;
-            margin-top: 0.25rem;
-            border: 1px dashed #444444;
-        }
+_SAVED_PILL_TMPL = (
+    '<div class="rijks-summary-pill">Saved artworks: <strong>{count}</strong></div>'
+)
 
-        .rijks-footer {
-            margin-top: 2.5rem;
-            padding-top: 0.75rem;
-            border-top: 1px solid #262626;
-            font-size: 0.8rem;
-            color: #aaaaaa;
-            text-align: center;
-        }
+_FAV_BADGE = '<span class="rijks-badge rijks-badge-primary">⭐ In my selection</span>'
+_NOTES_BADGE = '<span class="rijks-badge rijks-badge-secondary">📝 Notes</span>'
 
-        .stButton > button { border-radius: 999px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+# Badge row per (is_fav, has_notes) combination
+_BADGE_ROWS = {
+    (True, True): f'<div class="rijks-badge-row">{_FAV_BADGE} {_NOTES_BADGE}</div>',
+    (True, False): f'<div class="rijks-badge-row">{_FAV_BADGE}</div>',
+    (False, True): f'<div class="rijks-badge-row">{_NOTES_BADGE}</div>',
+}
+
+
+def inject_custom_css() -> None:
+    """Inject dark theme and card styling for the Explorer page."""
+    st.html(EXPLORER_CSS_HTML)
 
 
 def show_footer() -> None:
     """Show a small footer acknowledging the Rijksmuseum API."""
-    st.markdown(
-        """
-        <div class="rijks-footer">
-            Rijksmuseum Explorer — prototype created for study & research purposes.<br>
-            Data & images provided by the Rijksmuseum API.
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(EXPLORER_FOOTER_HTML, unsafe_allow_html=True)
 
 
 inject_custom_css()
@@ -151,92 +77,167 @@ inject_custom_css()
 # ============================================================
 # Helpers (cache for faster reruns)
 # ============================================================
-@st.cache_data(show_spinner=False)
-def _read_json_file(path_str: str) -> dict:
-    """Safe JSON file reader that always returns a dict (or empty dict)."""
-    try:
-        with open(path_str, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
-
-
-def load_favorites() -> None:
-    """Load favorites into session_state['favorites'] from local JSON file."""
-    if "favorites" in st.session_state:
-        return
-    st.session_state["favorites"] = (
-        _read_json_file(str(FAV_FILE)) if FAV_FILE.exists() else {}
-    )
+def load_favorites() -> dict:
+    """
+    Return session_state['favorites'], loading it from the local JSON file
+    the first time in a session.
+    """
+    favorites = st.session_state.get("favorites")
+    if favorites is None:
+        favorites = read_json_file(FAV_FILE)
+        st.session_state["favorites"] = favorites
+    return favorites
 
 
-def load_notes() -> None:
-    """Load notes into session_state['notes'] from local JSON file."""
-    if "notes" in st.session_state:
-        return
-    st.session_state["notes"] = (
-        _read_json_file(str(NOTES_FILE)) if NOTES_FILE.exists() else {}
+def load_notes() -> dict:
+    """
+    Return session_state['notes'], loading it from the local JSON file
+    the first time in a session.
+    """
+    notes = st.session_state.get("notes")
+    if notes is None:
+        notes = read_json_file(NOTES_FILE)
+        st.session_state["notes"] = notes
+    return notes
+
+
+def mark_favorites_dirty() -> None:
+    """Schedule a single favorites save at the end of the current rerun."""
+    st.session_state["_fav_dirty"] = True
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def search_artworks_cached(
+    query: str,
+    object_type: str | None,
+    sort: str,
+    page_size: int,
+    page: int,
+) -> tuple[list[dict], int]:
+    """
+    search_artworks() cached for an hour per argument tuple, so repeating a
+    search (re-clicks, paging back and forth) does not hit the API again.
+
+    st.cache_data hands out a fresh copy on every call, so callers may
+    modify the returned artworks.
+    """
+    return search_artworks(
+        query=query,
+        object_type=object_type,
+        sort=sort,
+        page_size=page_size,
+        page=page,
     )
 
 
-def save_favorites() -> None:
-    """Persist current favorites to disk and clear the file cache."""
-    try:
-        with open(FAV_FILE, "w", encoding="utf-8") as f:
-            json.dump(st.session_state["favorites"], f, ensure_ascii=False, indent=2)
-        # Avoid stale cache for _read_json_file
-        _read_json_file.clear()
-    except Exception:
-        # Favorites are a convenience layer; never break the UI here
-        pass
+def enrich_artwork(art: dict) -> dict:
+    """
+    Precompute per-artwork fields used by the filters and the results grid:
+
+    - `img`: best image URL (get_best_image_url)
+    - `year`: numeric year (extract_year)
+    - `web`: Rijksmuseum website link
+    - `materials_lc` / `places_lc`: lowercased, comma-joined materials and
+      production places (haystacks for the metadata filters)
+
+    They are returned as a separate dict (kept in session_state["result_meta"]
+    by objectNumber) instead of being written into the artwork, because the
+    artwork itself is what gets saved to favorites and exported.
+    """
+    return {
+        "img": get_best_image_url(art),
+        "year": extract_year(art.get("dating") or {}),
+        "web": (art.get("links") or {}).get("web"),
+        "materials_lc": ", ".join(art.get("materials") or []).lower(),
+        "places_lc": ", ".join(art.get("productionPlaces") or []).lower(),
+    }
 
 
 def passes_metadata_filters(
-    art: dict,
+    meta: dict,
     year_min: int,
     year_max: int,
-    material_filter: str,
-    place_filter: str,
+    material_needle: str,
+    place_needle: str,
 ) -> bool:
     """
-    Apply the local metadata filters to a single artwork:
+    Apply the local metadata filters to a single artwork, using its
+    precomputed fields (see enrich_artwork):
+
+    - year range
+    - material substring
+    - production place substring
 
-    - year range (based on extract_year)
-    - material substring (materials list from API)
-    - production place substring (productionPlaces list from API)
+    `material_needle` and `place_needle` must already be lowercased
+    (see enrich_and_filter); an empty string disables that filter.
     """
-    dating = art.get("dating") or {}
-    year = extract_year(dating)
+    year = meta["year"]
     if year is not None and (year < year_min or year > year_max):
         return False
 
-    if material_filter:
-        materials = art.get("materials") or []
-        if material_filter.lower() not in ", ".join(materials).lower():
-            return False
+    if material_needle and material_needle not in meta["materials_lc"]:
+        return False
 
-    if place_filter:
-        places = art.get("productionPlaces") or []
-        if place_filter.lower() not in ", ".join(places).lower():
-            return False
+    if place_needle and place_needle not in meta["places_lc"]:
+        return False
 
     return True
 
 
+def enrich_and_filter(
+    results: list[dict] | None,
+    year_min: int,
+    year_max: int,
+    material_filter: str,
+    place_filter: str,
+) -> tuple[list[dict], dict[str, dict]]:
+    """
+    Enrich the API results (enrich_artwork) and keep the ones that pass the
+    local metadata filters, in a single pass over `results`.
+
+    Returns (kept artworks, objectNumber -> enriched fields). The filter
+    strings are normalized once for the whole batch instead of once per
+    artwork. Without material/place filters only the year range is checked,
+    inline.
+    """
+    material_needle = material_filter.lower()
+    place_needle = place_filter.lower()
+    text_filters = bool(material_needle or place_needle)
+
+    kept: list[dict] = []
+    result_meta: dict[str, dict] = {}
+    for art in results or ():
+        meta = enrich_artwork(art)
+        if text_filters:
+            if not passes_metadata_filters(
+                meta,
+                year_min=year_min,
+                year_max=year_max,
+                material_needle=material_needle,
+                place_needle=place_needle,
+            ):
+                continue
+        elif (year := meta["year"]) is not None and not year_min <= year <= year_max:
+            # Common case: no text filters, only the (cheap) year range check
+            continue
+
+        kept.append(art)
+        if art.get("objectNumber"):
+            result_meta[art["objectNumber"]] = meta
+
+    return kept, result_meta
+
+
 # ============================================================
 # Session init (state FIRST)
 # ============================================================
-load_favorites()
-st.session_state.setdefault("favorites", {})
-favorites = st.session_state["favorites"]
-
-load_notes()
-st.session_state.setdefault("notes", {})
-notes = st.session_state["notes"]
+# Favorites are needed on every rerun (saved-artworks pill); notes are
+# only read by the results grid, which loads them on demand.
+favorites = load_favorites()
 
 st.session_state.setdefault("results", [])
 st.session_state.setdefault("search_meta", {})
+st.session_state.setdefault("result_meta", {})
 
 # Analytics: page view (Explorer) — once per session
 track_event_once(
@@ -247,16 +248,72 @@ track_event_once(
 )
 
 # ============================================================
-# Sidebar (no form; one button at the end)
+# Sidebar options (constants)
 # ============================================================
+# Tuples of literals are compile-time constants, so reruns do not rebuild
+# these option lists.
+OBJECT_TYPE_OPTIONS = ("Any", "painting", "print", "drawing", "sculpture", "photo", "other")
+
+SORT_MAP = {
+    "Relevance (default)": "relevance",
+    "Artist name (A–Z)": "artist",
+    "Date (oldest → newest)": "chronologic",
+    "Date (newest → oldest)": "achronologic",
+}
+SORT_LABELS = (
+    "Relevance (default)",
+    "Artist name (A–Z)",
+    "Date (oldest → newest)",
+    "Date (newest → oldest)",
+)
+
+MATERIAL_OPTIONS = (
+    "(any)",
+    "oil on canvas",
+    "paper",
+    "wood",
+    "ink",
+    "etching",
+    "bronze",
+    "silver",
+    "porcelain",
+    "Custom…",
+)
+
+PLACE_OPTIONS = (
+    "(any)",
+    "Amsterdam",
+    "Haarlem",
+    "Delft",
+    "Utrecht",
+    "The Hague",
+    "Rotterdam",
+    "Leiden",
+    "Antwerp",
+    "Paris",
+    "London",
+    "Italy",
+    "Germany",
+    "Brazil",
+    "Custom…",
+)
+
+
+# ============================================================
+# Sidebar (filters in a form; one submit button at the end)
+# ============================================================
+# Widgets inside the form do not rerun the script while they are being
+# edited; everything is applied at once by the submit button. "Result page"
+# stays outside the form so that changing it still searches immediately.
 sidebar = st.sidebar
 sidebar.header("🧭 Explore & Filter")
+filters_form = sidebar.form("explorer_filters", border=False)
 
 # ------------------------
 # Search
 # ------------------------
-sidebar.subheader("Search")
-search_term = sidebar.text_input(
+filters_form.subheader("Search")
+search_term = filters_form.text_input(
     "Search term",
     value="Rembrandt",
     help="Type artist name, title, theme, etc.",
@@ -265,31 +322,20 @@ search_term = sidebar.text_input(
 # ------------------------
 # Basic filters
 # ------------------------
-sidebar.subheader("Basic filters")
-object_type = sidebar.selectbox(
+filters_form.subheader("Basic filters")
+object_type = filters_form.selectbox(
     "Object type",
-    options=["Any", "painting", "print", "drawing", "sculpture", "photo", "other"],
+    options=OBJECT_TYPE_OPTIONS,
     help="Filter by broad object category.",
 )
 
-sort_label = sidebar.selectbox(
+sort_label = filters_form.selectbox(
     "Sort results by",
-    options=[
-        "Relevance (default)",
-        "Artist name (A–Z)",
-        "Date (oldest → newest)",
-        "Date (newest → oldest)",
-    ],
+    options=SORT_LABELS,
 )
-sort_map = {
-    "Relevance (default)": "relevance",
-    "Artist name (A–Z)": "artist",
-    "Date (oldest → newest)": "chronologic",
-    "Date (newest → oldest)": "achronologic",
-}
-sort_by = sort_map[sort_label]
+sort_by = SORT_MAP[sort_label]
 
-num_results = sidebar.slider(
+num_results = filters_form.slider(
     "Number of results to request",
     min_value=6,
     max_value=30,
@@ -297,41 +343,25 @@ num_results = sidebar.slider(
     step=3,
 )
 
-result_page = sidebar.number_input(
-    "Result page",
-    min_value=1,
-    value=1,
-    step=1,
-    help="Page of results to request from the API (1 = first page).",
-)
-
-# Detect page changes to trigger a new search automatically
-if "last_result_page" not in st.session_state:
-    st.session_state["last_result_page"] = int(result_page)
-
-page_changed = int(result_page) != int(st.session_state["last_result_page"])
-if page_changed:
-    st.session_state["last_result_page"] = int(result_page)
-
 # ------------------------
 # Advanced filters
 # ------------------------
-sidebar.subheader("Advanced filters")
-year_min, year_max = sidebar.slider(
+filters_form.subheader("Advanced filters")
+year_min, year_max = filters_form.slider(
     "Year range (approx.)",
     min_value=1500,
     max_value=2025,
     value=(1600, 1900),
     step=10,
 )
-sidebar.caption(
+filters_form.caption(
     "Year range is applied after the API search, based on metadata returned by the Rijksmuseum API."
 )
 
 # ------------------------
 # Text filters (helper explanation)
 # ------------------------
-sidebar.markdown(
+filters_form.markdown(
     """
 **Text filters (helper)**
 
@@ -350,76 +380,71 @@ Use short keywords, for example:
 # ------------------------
 # Text filters (optional, local metadata)
 # ------------------------
-sidebar.subheader("Text filters (optional)")
-sidebar.caption(
+filters_form.subheader("Text filters (optional)")
+filters_form.caption(
     "These filters search inside the artwork metadata: materials and production places. "
     "Leave as '(any)' if you do not want to filter by text."
 )
 
-material_presets = [
-    "(any)",
-    "oil on canvas",
-    "paper",
-    "wood",
-    "ink",
-    "etching",
-    "bronze",
-    "silver",
-    "porcelain",
-]
-material_choice = sidebar.selectbox(
+# Inside a form the custom inputs cannot appear only after "Custom…" is
+# picked (no rerun happens), so they are always shown and only used then.
+material_choice = filters_form.selectbox(
     "Material contains",
-    options=material_presets + ["Custom…"],
+    options=MATERIAL_OPTIONS,
+)
+custom_material = filters_form.text_input(
+    "Custom material filter",
+    value="",
+    help="Used when “Custom…” is selected above.",
 )
 if material_choice == "(any)":
     material_filter = ""
 elif material_choice == "Custom…":
-    material_filter = sidebar.text_input(
-        "Custom material filter",
-        value="",
-    )
+    material_filter = custom_material
 else:
     material_filter = material_choice
 
-place_presets = [
-    "(any)",
-    "Amsterdam",
-    "Haarlem",
-    "Delft",
-    "Utrecht",
-    "The Hague",
-    "Rotterdam",
-    "Leiden",
-    "Antwerp",
-    "Paris",
-    "London",
-    "Italy",
-    "Germany",
-    "Brazil",
-]
-place_choice = sidebar.selectbox(
+place_choice = filters_form.selectbox(
     "Production place contains",
-    options=place_presets + ["Custom…"],
+    options=PLACE_OPTIONS,
+)
+custom_place = filters_form.text_input(
+    "Custom production place filter",
+    value="",
+    help="Used when “Custom…” is selected above.",
 )
 if place_choice == "(any)":
     place_filter = ""
 elif place_choice == "Custom…":
-    place_filter = sidebar.text_input(
-        "Custom production place filter",
-        value="",
-    )
+    place_filter = custom_place
 else:
     place_filter = place_choice
 
 # Small vertical spacer before the main button
-sidebar.markdown("<div style='height: 0.75rem'></div>", unsafe_allow_html=True)
+filters_form.markdown("<div style='height: 0.75rem'></div>", unsafe_allow_html=True)
 
-# Final sidebar button (no forms, no form_submit_button)
-run_search = sidebar.button(
+# Final sidebar button (submits the whole form)
+run_search = filters_form.form_submit_button(
     "🔍 Apply filters & search",
     use_container_width=True,
 )
 
+result_page = sidebar.number_input(
+    "Result page",
+    min_value=1,
+    value=1,
+    step=1,
+    help="Page of results to request from the API (1 = first page).",
+)
+
+# Detect page changes to trigger a new search automatically
+if "last_result_page" not in st.session_state:
+    st.session_state["last_result_page"] = int(result_page)
+
+page_changed = int(result_page) != int(st.session_state["last_result_page"])
+if page_changed:
+    st.session_state["last_result_page"] = int(result_page)
+
 # Reminder just below the button
 sidebar.caption(
     "Artworks marked as **In my selection** remain saved across searches and sessions. "
@@ -475,11 +500,26 @@ with st.expander("ℹ️ How the search works (quick guide)", expanded=False):
 
 # Placeholder for the saved-artworks counter pill (rendered near the top)
 saved_pill_placeholder = st.empty()
-saved_pill_placeholder.markdown(
-    f'<div class="rijks-summary-pill">Saved artworks: '
-    f'<strong>{len(favorites)}</strong></div>',
-    unsafe_allow_html=True,
-)
+_saved_pill_count = None
+
+
+def show_saved_pill(count: int) -> None:
+    """
+    Draw the saved-artworks pill, unless it already shows `count` in this run.
+
+    The pill must be drawn on every rerun (Streamlit drops elements a rerun
+    does not emit), but within a run it is only re-sent when the count changes.
+    """
+    global _saved_pill_count
+    if count == _saved_pill_count:
+        return
+    saved_pill_placeholder.markdown(
+        _SAVED_PILL_TMPL.format(count=count), unsafe_allow_html=True
+    )
+    _saved_pill_count = count
+
+
+show_saved_pill(len(favorites))
 
 
 # ============================================================
@@ -494,32 +534,32 @@ if run_search or page_changed:
         try:
             with st.spinner("Searching artworks in the Rijksmuseum collection..."):
                 # We request a specific API page as well
-                raw_results, total_found = search_artworks(
+                raw_results, total_found = search_artworks_cached(
                     query=search_term,
                     object_type=object_type_param,
                     sort=sort_by,
-                    page_size=num_results,
-                    page=result_page,
+                    page_size=int(num_results),
+                    page=int(result_page),
                 )
 
-            # Apply local metadata filters (year/material/place) on top of API results
-            filtered_results = [
-                art
-                for art in (raw_results or [])
-                if passes_metadata_filters(
-                    art,
-                    year_min=year_min,
-                    year_max=year_max,
-                    material_filter=material_filter,
-                    place_filter=place_filter,
-                )
-            ]
+            api_count = len(raw_results) if raw_results else 0
+
+            # Precompute image URL / year / link once per search and apply
+            # local metadata filters (year/material/place) on top of API results
+            filtered_results, result_meta = enrich_and_filter(
+                raw_results,
+                year_min=year_min,
+                year_max=year_max,
+                material_filter=material_filter,
+                place_filter=place_filter,
+            )
 
             st.session_state["results"] = filtered_results
+            st.session_state["result_meta"] = result_meta
             # Store metadata about this search (for captions and debug)
             st.session_state["search_meta"] = {
                 "total_found": total_found,
-                "api_count": len(raw_results or []),
+                "api_count": api_count,
                 "filtered_count": len(filtered_results),
                 "page": int(result_page),
                 "page_size": int(num_results),
@@ -546,17 +586,13 @@ if run_search or page_changed:
                     "has_place_filter": bool(place_filter),
                     # Result statistics
                     "api_total_found": int(total_found or 0),
-                    "api_returned": len(raw_results or []),
+                    "api_returned": api_count,
                     "filtered_count": len(filtered_results),
                 },
             )
 
             # Keep the pill in sync with the current favorites
-            saved_pill_placeholder.markdown(
-                f'<div class="rijks-summary-pill">Saved artworks: '
-                f'<strong>{len(st.session_state.get("favorites", {}))}</strong></div>',
-                unsafe_allow_html=True,
-            )
+            show_saved_pill(len(st.session_state.get("favorites", {})))
         except RuntimeError as e:
             st.error(str(e))
             st.session_state["results"] = []
@@ -620,37 +656,37 @@ if results:
 
     # Bulk ADD ALL logic
     if add_all_clicked:
-        added = 0
-        for art in results:
-            obj_num = art.get("objectNumber")
-            if not obj_num:
-                continue
+        results_by_id = {
+            art["objectNumber"]: art for art in results if art.get("objectNumber")
+        }
+        # Existing favorites are kept as they are (they may carry extra
+        # flags such as _compare_candidate); only new artworks are added
+        new_items = {
+            obj_num: art
+            for obj_num, art in results_by_id.items()
+            if obj_num not in favorites
+        }
+        favorites.update(new_items)
+        added = len(new_items)
 
-            if obj_num not in favorites:
-                favorites[obj_num] = art
-                added += 1
-
-                # Also count each newly added artwork as an "artwork_view"
-                track_event(
-                    event="artwork_view",
-                    page="Explorer",
-                    props={
-                        "object_id": obj_num,
-                        "artist": art.get("principalOrFirstMaker", "Unknown artist"),
-                        "source": "selection_add_all",
-                    },
-                )
+        # Also count each newly added artwork as an "artwork_view"
+        for obj_num, art in new_items.items():
+            track_event(
+                event="artwork_view",
+                page="Explorer",
+                props={
+                    "object_id": obj_num,
+                    "artist": art.get("principalOrFirstMaker", "Unknown artist"),
+                    "source": "selection_add_all",
+                },
+            )
 
-            st.session_state[f"fav_{obj_num}"] = True
+        st.session_state.update({f"fav_{obj_num}": True for obj_num in results_by_id})
         st.session_state["favorites"] = favorites
-        save_favorites()
+        mark_favorites_dirty()
 
         # Update the pill with the new selection size
-        saved_pill_placeholder.markdown(
-            f'<div class="rijks-summary-pill">Saved artworks: '
-            f'<strong>{len(favorites)}</strong></div>',
-            unsafe_allow_html=True,
-        )
+        show_saved_pill(len(favorites))
 
         # Analytics: bulk selection add event
         track_event(
@@ -672,26 +708,18 @@ if results:
 
     # Bulk REMOVE ALL logic
     if remove_all_clicked:
-        removed = 0
-        for art in results:
-            obj_num = art.get("objectNumber")
-            if not obj_num:
-                continue
-
-            if obj_num in favorites:
-                favorites.pop(obj_num)
-                removed += 1
+        result_ids = {art["objectNumber"] for art in results if art.get("objectNumber")}
+        to_remove = result_ids & favorites.keys()
+        for obj_num in to_remove:
+            del favorites[obj_num]
+        removed = len(to_remove)
 
-            st.session_state[f"fav_{obj_num}"] = False
+        st.session_state.update({f"fav_{obj_num}": False for obj_num in result_ids})
 
         st.session_state["favorites"] = favorites
-        save_favorites()
+        mark_favorites_dirty()
 
-        saved_pill_placeholder.markdown(
-            f'<div class="rijks-summary-pill">Saved artworks: '
-            f'<strong>{len(favorites)}</strong></div>',
-            unsafe_allow_html=True,
-        )
+        show_saved_pill(len(favorites))
 
         # Analytics: bulk selection remove event
         track_event(
@@ -713,6 +741,8 @@ if results:
 # Results grid (cards)
 # ------------------------------------------------------------
 if results:
+    notes = load_notes()
+    result_meta = st.session_state["result_meta"]
     cards_per_row = 3
     for start_idx in range(0, len(results), cards_per_row):
         row_items = results[start_idx : start_idx + cards_per_row]
@@ -724,46 +754,33 @@ if results:
                 object_number = art.get("objectNumber")
                 title = art.get("title", "Untitled")
                 maker = art.get("principalOrFirstMaker", "Unknown artist")
-                web_link = art.get("links", {}).get("web")
+                # Precomputed fields (results without an objectNumber are
+                # not in result_meta; compute theirs on the fly)
+                card_meta = result_meta.get(object_number) or enrich_artwork(art)
+                web_link = card_meta["web"]
 
                 note_text = notes.get(object_number, "") if object_number else ""
                 has_notes = isinstance(note_text, str) and note_text.strip() != ""
 
                 # --- Image area: always show either an image OR a clear message ---
-                img_url = get_best_image_url(art)
+                img_url = card_meta["img"]
 
                 if img_url:
                     try:
                         st.image(img_url, width="stretch")
                     except Exception:
                         # Image failed to load (timeout, 403, etc.)
-                        st.markdown(
-                            """
-                            <div class="rijks-no-image-msg">
-                            The image for this artwork could not be loaded via the public API
-                            at this moment.<br>
-                            You can still open it on the Rijksmuseum website using the link below.
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
+                        st.markdown(EXPLORER_IMAGE_FAILED_HTML, unsafe_allow_html=True)
                 else:
                     # No public image available from the API
-                    st.markdown(
-                        """
-                        <div class="rijks-no-image-msg">
-                        No public image is available for this artwork via the Rijksmuseum API.<br>
-                        If needed, please use the link below to check it directly on the museum website.
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                st.markdown(
-                    f'<div class="rijks-card-title">{title}</div>',
-                    unsafe_allow_html=True,
-                )
+                    st.markdown(EXPLORER_NO_IMAGE_HTML, unsafe_allow_html=True)
+
+                # Title + artist in a single markdown call (values HTML-escaped)
                 st.markdown(
-                    f'<div class="rijks-card-caption">{maker}</div>',
+                    _CARD_HEADER_TMPL.format(
+                        title=html.escape(str(title)),
+                        maker=html.escape(str(maker)),
+                    ),
                     unsafe_allow_html=True,
                 )
 
@@ -818,49 +835,41 @@ if results:
                             )
 
                         st.session_state["favorites"] = favorites
-                        save_favorites()
+                        mark_favorites_dirty()
 
-                        saved_pill_placeholder.markdown(
-                            f'<div class="rijks-summary-pill">Saved artworks: '
-                            f'<strong>{len(favorites)}</strong></div>',
-                            unsafe_allow_html=True,
-                        )
+                        show_saved_pill(len(favorites))
                     is_fav = checked
                 else:
                     is_fav = False
 
+                # Everything below the checkbox (badges, date/year, object ID,
+                # museum link) is sent as a single HTML block
+                card_parts = []
+
                 # Badges row (selection + notes)
-                badge_parts = []
-                if is_fav:
-                    badge_parts.append(
-                        '<span class="rijks-badge rijks-badge-primary">⭐ In my selection</span>'
-                    )
-                if has_notes:
-                    badge_parts.append(
-                        '<span class="rijks-badge rijks-badge-secondary">📝 Notes</span>'
-                    )
-                if badge_parts:
-                    st.markdown(
-                        '<div class="rijks-badge-row">'
-                        + " ".join(badge_parts)
-                        + "</div>",
-                        unsafe_allow_html=True,
-                    )
+                if is_fav or has_notes:
+                    card_parts.append(_BADGE_ROWS[is_fav, has_notes])
 
                 # Basic metadata (date/year and object ID)
-                dating = art.get("dating") or {}
-                presenting_date = dating.get("presentingDate")
-                year = extract_year(dating) if dating else None
+                presenting_date = (art.get("dating") or {}).get("presentingDate")
+                year = card_meta["year"]
                 if presenting_date:
-                    st.text(f"Date: {presenting_date}")
+                    card_parts.append(
+                        f'<div class="rijks-card-meta">Date: {html.escape(str(presenting_date))}</div>'
+                    )
                 elif year:
-                    st.text(f"Year: {year}")
+                    card_parts.append(f'<div class="rijks-card-meta">Year: {year}</div>')
 
-                st.text(f"Object ID: {object_number}")
+                card_parts.append(
+                    f'<div class="rijks-card-meta">Object ID: {html.escape(str(object_number))}</div>'
+                )
                 if web_link:
-                    st.markdown(f"[View on Rijksmuseum website]({web_link})")
+                    card_parts.append(
+                        f'<div class="rijks-card-meta"><a href="{html.escape(web_link)}" '
+                        'target="_blank">View on Rijksmuseum website</a></div>'
+                    )
 
-                st.markdown("</div>", unsafe_allow_html=True)
+                st.markdown("\n".join(card_parts), unsafe_allow_html=True)
 else:
     meta = st.session_state.get("search_meta", {})
     total_found = meta.get("total_found", 0)
@@ -879,6 +888,14 @@ else:
             "“Apply filters & search” to retrieve artworks from the Rijksmuseum API."
         )
 
+# ------------------------------------------------------------
+# Persist selection changes made during this rerun (one write)
+# ------------------------------------------------------------
+# The flag lives in session_state, so if a rerun is interrupted before
+# reaching this point the pending save happens on the next one.
+if st.session_state.pop("_fav_dirty", False):
+    save_favorites(st.session_state["favorites"], st.session_state)
+
 # ============================================================
 # Footer
 # ============================================================